@@ -1,4 +1,4 @@
-from tkinter import Tk, BOTH, Canvas
+from tkinter import Tk, BOTH, Canvas, PhotoImage
 
 class Window:
     def __init__(self, width, height):
@@ -10,9 +10,17 @@ class Window:
 
         self.running = False
         self.__is_valid = True
+        # PhotoImages must be kept alive for as long as their items are shown
+        self.__images = {}
+
+        # Counters so batching improvements can be measured
+        self.items_created = 0
+        self.items_updated = 0
+        self.redraw_count = 0
 
     def redraw(self):
         if self.__is_valid and self.__root.winfo_exists():
+            self.redraw_count += 1
             self.canvas.update_idletasks()
             self.canvas.update()
 
@@ -21,6 +29,13 @@ class Window:
         while self.running:
             self.redraw()
 
+    def after(self, delay_ms, callback):
+        return self.__root.after(delay_ms, callback)
+
+    def wait_event(self):
+        # Block until Tk has handled one event (a timer, input or a repaint)
+        self.__root.tk.dooneevent(0)
+
     def close(self):
         self.running = False
         self.__is_valid = False
@@ -29,12 +44,72 @@ class Window:
     def is_open(self):
         return self.__is_valid and self.__root.winfo_exists()
 
-    def drawLine(self, Line, fill_color="black"):
+    def drawLine(self, Line, fill_color="black", redraw=True):
         Line.draw(self.canvas, fill_color)
-        self.redraw()
+        self.items_created += 1
+        if redraw:
+            self.redraw()
+
+    def drawLines(self, lines, fill_color="black", redraw=True):
+        # Create every item first and pump the Tk event loop only once
+        for line in lines:
+            line.draw(self.canvas, fill_color)
+            self.items_created += 1
+        if redraw:
+            self.redraw()
+
+    def fillRect(self, x1, y1, x2, y2, fill_color="white", redraw=True):
+        self.canvas.create_rectangle(x1, y1, x2, y2, fill=fill_color, outline="")
+        self.items_created += 1
+        if redraw:
+            self.redraw()
+
+    def createLine(self, Line, fill_color="black", tags=()):
+        """Create a line item that is kept and updated rather than redrawn; returns its id."""
+        self.items_created += 1
+        return Line.draw(self.canvas, fill_color, tags)
+
+    def updateItem(self, item, line=None, **options):
+        """Move an existing item to line and/or change its options (fill, state, ...)."""
+        if line is not None:
+            self.canvas.coords(item, line.start.x, line.start.y, line.end.x, line.end.y)
+        if options:
+            self.canvas.itemconfigure(item, **options)
+        self.items_updated += 1
+
+    def setTagState(self, tag, hidden):
+        """Hide or show every item with tag in one call."""
+        self.canvas.itemconfigure(tag, state="hidden" if hidden else "normal")
+        self.items_updated += 1
+
+    def raiseTag(self, tag):
+        """Put the items with tag, or the single item with that id, on top."""
+        self.canvas.tag_raise(tag)
+
+    def drawImage(self, x, y, data, tags=()):
+        """Show a PPM or PGM image with its top-left corner at (x, y); returns the item id."""
+        image = PhotoImage(data=data)
+        item = self.canvas.create_image(x, y, image=image, anchor="nw", tags=tags)
+        self.__images[item] = image
+        self.items_created += 1
+        return item
+
+    def moveItems(self, tag, dx, dy):
+        self.canvas.move(tag, dx, dy)
+
+    def deleteItems(self, tag):
+        for item in self.canvas.find_withtag(tag):
+            self.__images.pop(item, None)
+        self.canvas.delete(tag)
+
+    def reset_counters(self):
+        self.items_created = 0
+        self.items_updated = 0
+        self.redraw_count = 0
 
     def clear(self):
         self.canvas.delete("all")
+        self.__images.clear()
         self.redraw()
 
 
@@ -92,6 +167,6 @@ class Line:
     def __repr__(self):
         return str(self)
     
-    def draw(self, canvas, fill_color="black"):
-        canvas.create_line(self.start.x, self.start.y, self.end.x, self.end.y, width=2, fill=fill_color)
+    def draw(self, canvas, fill_color="black", tags=()):
+        return canvas.create_line(self.start.x, self.start.y, self.end.x, self.end.y, width=2, fill=fill_color, tags=tags)
 
@@ -0,0 +1,126 @@
+import math
+import time
+
+
+class AnimationScheduler:
+    """Plays drawing steps as frames driven by Tk's after() timer.
+
+    Each frame draws up to steps_per_frame steps, so a long animation costs
+    one event-loop pass per frame rather than a redraw and a sleep per step.
+    max_duration, in seconds, raises the per-frame budget when there are
+    more steps than would fit at the target fps. instant draws everything
+    in one go with a single redraw.
+    """
+
+    def __init__(self, fps=60, steps_per_frame=1, max_duration=None, instant=False):
+        if fps <= 0:
+            raise ValueError("fps must be positive.")
+        if steps_per_frame < 1:
+            raise ValueError("steps_per_frame must be at least 1.")
+        self.fps = fps
+        self.steps_per_frame = steps_per_frame
+        self.max_duration = max_duration
+        self.instant = instant
+        # Running totals: frames drawn, steps drawn, seconds spent drawing
+        # steps and seconds spent waiting on the Tk event loop.
+        self.frames = 0
+        self.steps = 0
+        self.draw_time = 0.0
+        self.wait_time = 0.0
+
+    @property
+    def frame_interval(self):
+        """Milliseconds between frames."""
+        return max(1, round(1000 / self.fps))
+
+    def budget(self, total_steps):
+        """Steps drawn per frame for an animation of total_steps steps."""
+        if self.max_duration is None or total_steps is None:
+            return self.steps_per_frame
+        frames = max(1, int(self.max_duration * self.fps))
+        return max(self.steps_per_frame, math.ceil(total_steps / frames))
+
+    def play(self, window, steps, draw, check_interrupt=None):
+        """Call draw(step) for every step, a frame's worth at a time.
+
+        check_interrupt is polled once per frame; InterruptedError is raised
+        if it returns false or the window is closed.
+        """
+        total = len(steps) if hasattr(steps, "__len__") else None
+        steps = iter(steps)
+        if self.instant:
+            self.__check(window, check_interrupt)
+            start = time.perf_counter()
+            for step in steps:
+                draw(step)
+                self.steps += 1
+            self.frames += 1
+            window.redraw()
+            self.draw_time += time.perf_counter() - start
+            return
+
+        budget = self.budget(total)
+        state = {"done": False, "error": None}
+
+        def frame():
+            start = time.perf_counter()
+            try:
+                self.__check(window, check_interrupt)
+                for _ in range(budget):
+                    step = next(steps, state)
+                    if step is state:
+                        state["done"] = True
+                        break
+                    draw(step)
+                    self.steps += 1
+                self.frames += 1
+            except BaseException as e:
+                state["error"] = e
+                state["done"] = True
+            self.draw_time += time.perf_counter() - start
+            if not state["done"]:
+                window.after(self.frame_interval, frame)
+
+        self.__run(window, frame, state)
+        window.redraw()
+
+    def pause(self, window, seconds, check_interrupt=None):
+        """Wait without blocking the Tk event loop."""
+        state = {"done": False, "error": None}
+
+        def wake():
+            state["done"] = True
+
+        def poll():
+            # Keep polling so an interrupt ends the pause early
+            try:
+                self.__check(window, check_interrupt)
+            except InterruptedError as e:
+                state["error"] = e
+                state["done"] = True
+            if not state["done"]:
+                window.after(self.frame_interval, poll)
+
+        window.after(max(0, round(seconds * 1000)), wake)
+        self.__run(window, poll, state)
+
+    def __run(self, window, first, state):
+        window.after(0, first)
+        start = time.perf_counter()
+        draw_time = self.draw_time
+        try:
+            while not state["done"]:
+                if not window.is_open():
+                    raise InterruptedError("Animation interrupted")
+                window.wait_event()
+        finally:
+            # Frames run inside wait_event; only the rest is waiting
+            self.wait_time += time.perf_counter() - start - (self.draw_time - draw_time)
+        if state["error"] is not None:
+            raise state["error"]
+
+    def __check(self, window, check_interrupt):
+        if check_interrupt and not check_interrupt():
+            raise InterruptedError("Animation interrupted")
+        if not window.is_open():
+            raise InterruptedError("Animation interrupted")
@@ -0,0 +1,172 @@
+"""Generate and solve many seeded mazes across a pool of worker processes.
+
+    python batch.py --count 1000 --size 100x100 --output results.jsonl
+    python batch.py --jobs jobs.jsonl --workers 8 --maze-dir mazes/
+
+A job is (width, height, seed, entrance, exit). Every maze draws from its
+own random.Random, so a job produces the same maze whichever worker runs
+it, and the same maze as a sequential Maze(...) call with those arguments.
+Results stream back as jobs finish.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from grid import Grid
+from maze import Maze
+from solvers import SOLVERS
+import mazefile
+
+
+class BatchJob:
+    def __init__(self, width, height, seed, entrance=(0, 0), exit=None):
+        self.width = width
+        self.height = height
+        self.seed = seed
+        self.entrance = entrance
+        self.exit = exit
+
+    def as_dict(self):
+        return {"width": self.width, "height": self.height, "seed": self.seed,
+                "entrance": self.entrance, "exit": self.exit}
+
+    @classmethod
+    def from_dict(cls, data):
+        def coords(value):
+            return tuple(value) if isinstance(value, list) else value
+        return cls(data["width"], data["height"], data.get("seed"),
+                   coords(data.get("entrance", (0, 0))), coords(data.get("exit")))
+
+    def __repr__(self):
+        return f"BatchJob({self.width}x{self.height}, seed={self.seed})"
+
+
+class BatchResult:
+    """One finished job: the packed wall grid and solve statistics."""
+
+    def __init__(self, job, walls, entrance, exit_coords, carve_time, algorithm,
+                 path, nodes_expanded, solve_time):
+        self.job = job
+        self.walls = walls  # Wall nibbles packed two cells per byte
+        self.entrance = entrance
+        self.exit_coords = exit_coords
+        self.carve_time = carve_time
+        self.algorithm = algorithm
+        self.path = path
+        self.nodes_expanded = nodes_expanded
+        self.solve_time = solve_time
+
+    def grid(self):
+        """Unpack the walls into a Grid."""
+        walls = mazefile.unpack_nibbles(self.walls)
+        del walls[self.job.width * self.job.height:]
+        return Grid.from_walls(self.job.width, self.job.height, walls)
+
+    def save(self, path):
+        """Write the maze and its solution as a packed maze file."""
+        width = self.job.width
+        mazefile.save(path, width, self.job.height, self.grid().walls, self.job.seed,
+                      self.entrance, self.exit_coords, [y * width + x for x, y in self.path])
+
+    def as_dict(self):
+        return dict(self.job.as_dict(), entrance=self.entrance, exit=self.exit_coords,
+                    carve_time=self.carve_time, algorithm=self.algorithm,
+                    path_length=len(self.path), nodes_expanded=self.nodes_expanded,
+                    solve_time=self.solve_time)
+
+
+def run_job(job, algorithm="bfs"):
+    """Build and solve one maze. Runs inside the worker processes."""
+    maze = Maze(None, job.width, job.height, seed=job.seed, entrance=job.entrance, exit=job.exit)
+    result = maze.solve(algorithm=algorithm, render=False)
+    walls = bytes(maze.grid.walls)
+    if len(walls) % 2:
+        walls += b"\0"
+    return BatchResult(job, mazefile.pack_nibbles(walls), maze.entrance, maze.exit_coords,
+                       maze.carve_time, algorithm, result.path, result.nodes_expanded, result.elapsed)
+
+
+def _run_job(args):
+    return run_job(*args)
+
+
+def run_batch(jobs, workers=None, algorithm="bfs", chunksize=1):
+    """Yield a BatchResult for every job, in completion order.
+
+    workers defaults to the number of CPUs; workers=1 runs in-process.
+    """
+    if algorithm not in SOLVERS:
+        raise ValueError(f"Unknown solver algorithm: {algorithm!r}.")
+    tasks = ((job, algorithm) for job in jobs)
+    if workers == 1:
+        for task in tasks:
+            yield _run_job(task)
+        return
+    with multiprocessing.Pool(workers) as pool:
+        yield from pool.imap_unordered(_run_job, tasks, chunksize)
+
+
+def _parse_size(text):
+    width, _, height = text.partition("x")
+    return (int(width), int(height or width))
+
+
+def _parse_opening(text):
+    if text == "random":
+        return text
+    x, _, y = text.partition(",")
+    return (int(x), int(y))
+
+
+def _jobs_from_args(args):
+    if args.jobs:
+        with open(args.jobs) as f:
+            for line in f:
+                if line.strip():
+                    yield BatchJob.from_dict(json.loads(line))
+        return
+    width, height = args.size
+    entrance = args.entrance if args.entrance is not None else (0, 0)
+    for seed in range(args.first_seed, args.first_seed + args.count):
+        yield BatchJob(width, height, seed, entrance, args.exit)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate and solve seeded mazes in parallel.")
+    parser.add_argument("--jobs", help="JSON lines file of jobs (width, height, seed, entrance, exit)")
+    parser.add_argument("--count", type=int, default=100, help="number of seeded jobs to make")
+    parser.add_argument("--size", type=_parse_size, default=(30, 20), help="WIDTHxHEIGHT (default 30x20)")
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--entrance", type=_parse_opening, help="X,Y or random (default 0,0)")
+    parser.add_argument("--exit", type=_parse_opening, help="X,Y or random (default bottom-right)")
+    parser.add_argument("--algorithm", default="bfs", choices=sorted(SOLVERS))
+    parser.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--chunksize", type=int, default=1)
+    parser.add_argument("--output", help="write JSON lines here instead of stdout")
+    parser.add_argument("--maze-dir", help="also save every maze as a packed .maze file here")
+    args = parser.parse_args(argv)
+
+    if args.maze_dir:
+        os.makedirs(args.maze_dir, exist_ok=True)
+    out = open(args.output, "w") if args.output else sys.stdout
+    start = time.perf_counter()
+    done = 0
+    try:
+        for result in run_batch(_jobs_from_args(args), args.workers, args.algorithm, args.chunksize):
+            out.write(json.dumps(result.as_dict()) + "\n")
+            if args.maze_dir:
+                job = result.job
+                result.save(os.path.join(args.maze_dir, f"{job.width}x{job.height}_{job.seed}.maze"))
+            done += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - start
+    print(f"{done} mazes in {elapsed:.2f}s ({done / elapsed if elapsed else 0:.1f} mazes/s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,296 @@
+"""Reproducible benchmarks for maze generation, solving and rendering.
+
+Everything runs headless. Rendering is measured against a canvas stub that
+only counts the items it is asked to create, so the numbers cover our own
+drawing code rather than Tk.
+
+    python benchmark.py --output results.json
+    python benchmark.py --quick --compare results.json
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from Graphics import Window
+from animation import AnimationScheduler
+from maze import Maze
+from solvers import SOLVERS, get_solver
+import generators
+
+DEFAULT_SIZES = [(10, 10), (100, 100), (500, 500), (1000, 1000), (2000, 2000)]
+QUICK_SIZES = [(10, 10), (50, 50), (200, 200)]
+DEFAULT_SEEDS = [1, 2, 3]
+# Solve queries per size when measuring throughput across threads
+THROUGHPUT_QUERIES = 64
+# Per-cell drawing of millions of cells tells us nothing new and takes ages
+RENDER_LIMIT = 250_000
+# Wilson's first random walks are slow; compare generators on sizes up to this
+GENERATOR_LIMIT = 250_000
+# Slowdowns smaller than this many seconds are timer noise, not regressions
+MIN_DELTA = 0.001
+
+
+def available_generators():
+    """The backtracker plus every registered generator that can run here."""
+    names = ["backtracker"] + sorted(generators.GENERATORS)
+    if generators.np is None:
+        names = [name for name in names if name not in ("binary_tree", "sidewinder")]
+    return names
+
+
+class CountingCanvas:
+    """Canvas stand-in that counts create_* calls instead of drawing."""
+
+    def __init__(self):
+        self.operations = 0
+
+    def create_line(self, *args, **kwargs):
+        self.operations += 1
+        return self.operations
+
+    def create_rectangle(self, *args, **kwargs):
+        self.operations += 1
+        return self.operations
+
+    def delete(self, *args):
+        self.operations += 1
+
+    # Updates to existing items aren't creations, so they aren't counted
+    def coords(self, *args):
+        pass
+
+    def itemconfigure(self, *args, **kwargs):
+        pass
+
+    def tag_raise(self, *args):
+        pass
+
+
+class HeadlessWindow(Window):
+    """A Window with no Tk behind it; drawing goes to a CountingCanvas."""
+
+    def __init__(self, width=1024, height=768):
+        self.canvas = CountingCanvas()
+        self.running = False
+        self.items_created = 0
+        self.items_updated = 0
+        self.redraw_count = 0
+        self.__timers = []
+
+    def redraw(self):
+        self.redraw_count += 1
+
+    def is_open(self):
+        return True
+
+    def after(self, delay_ms, callback):
+        self.__timers.append(callback)
+
+    def wait_event(self):
+        # No clock to wait on: just fire the next timer
+        if self.__timers:
+            self.__timers.pop(0)()
+
+    def close(self):
+        pass
+
+    def clear(self):
+        self.canvas.delete("all")
+        self.redraw()
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    value = fn()
+    return time.perf_counter() - start, value
+
+
+def _record(results, name, samples, **extra):
+    results[name] = dict(seconds=statistics.median(samples), runs=len(samples), **extra)
+
+
+def run(sizes=DEFAULT_SIZES, seeds=DEFAULT_SEEDS, solvers=None, render_limit=RENDER_LIMIT, log=None,
+        algorithms=None, generator_limit=GENERATOR_LIMIT, threads=None):
+    """Run the benchmark matrix and return {benchmark name: measurements}.
+
+    The backtracker is measured as carve/SIZE; each other generation
+    algorithm as carve/ALGORITHM/SIZE, on the same sizes and seeds. With
+    threads, a list of pool sizes, solve throughput on one shared frozen
+    maze is measured as threads/COUNT/SIZE.
+    """
+    solvers = sorted(SOLVERS) if solvers is None else solvers
+    algorithms = available_generators() if algorithms is None else algorithms
+    results = {}
+    for width, height in sizes:
+        size = f"{width}x{height}"
+        cells = width * height
+        construct, carve, rates = [], [], []
+        solve_times = {name: [] for name in solvers}
+        solve_nodes = {name: [] for name in solvers}
+        for seed in seeds:
+            elapsed, maze = _timed(lambda: Maze(None, width, height, seed=seed,
+                                                entrance="random", exit="random"))
+            construct.append(elapsed)
+            carve.append(maze.carve_time)
+            rates.append(maze.carve_rate)
+            for name in solvers:
+                result = maze.solve(algorithm=name, render=False)
+                solve_times[name].append(result.elapsed)
+                solve_nodes[name].append(result.nodes_expanded)
+        _record(results, f"construct/{size}", construct, cells=cells)
+        _record(results, f"carve/{size}", carve, cells=cells,
+                cells_per_sec=statistics.median(rates))
+        for name in solvers:
+            _record(results, f"solve/{name}/{size}", solve_times[name],
+                    nodes_expanded=statistics.median(solve_nodes[name]))
+
+        if cells <= generator_limit:
+            for algorithm in algorithms:
+                if algorithm != "backtracker":
+                    _generate(results, algorithm, width, height, seeds)
+
+        if threads:
+            for count, seconds, rate in throughput(maze, threads):
+                results[f"threads/{count}/{size}"] = dict(seconds=seconds, runs=1, queries_per_sec=rate)
+
+        if cells <= render_limit:
+            _render(results, width, height, seeds)
+        if log:
+            log(f"{size}: construct {statistics.median(construct):.4f}s, "
+                f"carve {statistics.median(rates):,.0f} cells/s")
+    return results
+
+
+def _generate(results, algorithm, width, height, seeds):
+    carve, rates = [], []
+    for seed in seeds:
+        maze = Maze(None, width, height, seed=seed, entrance="random", exit="random", algorithm=algorithm)
+        carve.append(maze.carve_time)
+        rates.append(maze.carve_rate)
+    _record(results, f"carve/{algorithm}/{width}x{height}", carve, cells=width * height,
+            cells_per_sec=statistics.median(rates))
+
+
+def throughput(maze, threads=(1, 2, 4, 8), queries=THROUGHPUT_QUERIES, algorithm="bfs", seed=0):
+    """Solve the same random queries on one frozen maze from pools of each size.
+
+    Yields (thread count, seconds, queries per second).
+    """
+    maze.freeze()
+    grid = maze.grid
+    solver = get_solver(algorithm)
+    rng = random.Random(seed)
+    pairs = [((rng.randrange(grid.width), rng.randrange(grid.height)),
+              (rng.randrange(grid.width), rng.randrange(grid.height))) for _ in range(queries)]
+    for count in threads:
+        with ThreadPoolExecutor(count) as pool:
+            elapsed, _ = _timed(lambda: list(pool.map(lambda pair: solver(grid, *pair), pairs)))
+        yield count, elapsed, queries / elapsed if elapsed else 0.0
+
+
+def _render(results, width, height, seeds):
+    size = f"{width}x{height}"
+    bulk, per_cell = [], []
+    for seed in seeds:
+        window = HeadlessWindow()
+        maze = Maze(window, width, height, seed=seed,
+                    animation=AnimationScheduler(instant=True))
+        window.reset_counters()
+        window.canvas.operations = 0
+        elapsed, _ = _timed(maze.draw)
+        bulk.append(elapsed)
+        bulk_items = window.canvas.operations
+        bulk_redraws = window.redraw_count
+
+        window.reset_counters()
+        window.canvas.operations = 0
+
+        def draw_cells():
+            for row in maze._Maze__cells:
+                for cell in row:
+                    cell.draw()
+        elapsed, _ = _timed(draw_cells)
+        per_cell.append(elapsed)
+        cell_items = window.canvas.operations
+        cell_redraws = window.redraw_count
+    _record(results, f"render/bulk/{size}", bulk, items=bulk_items, redraws=bulk_redraws)
+    median = statistics.median(per_cell)
+    _record(results, f"render/cells/{size}", per_cell, items=cell_items, redraws=cell_redraws,
+            lines_per_sec=cell_items / median if median else 0.0)
+
+
+def compare(results, baseline, threshold=0.10, min_delta=MIN_DELTA):
+    """Benchmarks slower than baseline, as (name, old, new).
+
+    A benchmark regresses when it is both more than threshold slower
+    relatively and at least min_delta seconds slower outright, so jitter
+    on sub-millisecond timings isn't reported.
+    """
+    regressions = []
+    for name, current in sorted(results.items()):
+        previous = baseline.get(name)
+        if previous is None or not previous["seconds"]:
+            continue
+        old, new = previous["seconds"], current["seconds"]
+        if new > old * (1 + threshold) and new - old >= min_delta:
+            regressions.append((name, old, new))
+    return regressions
+
+
+def _parse_size(text):
+    width, _, height = text.partition("x")
+    return (int(width), int(height or width))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark maze generation, solving and rendering.")
+    parser.add_argument("--sizes", nargs="+", type=_parse_size, help="sizes as WIDTHxHEIGHT")
+    parser.add_argument("--seeds", nargs="+", type=int, help="seeds to run for each size")
+    parser.add_argument("--solvers", nargs="+", choices=sorted(SOLVERS))
+    parser.add_argument("--generators", nargs="+", choices=available_generators(),
+                        help="generation algorithms to compare (default: all available)")
+    parser.add_argument("--threads", nargs="+", type=int,
+                        help="also measure solve throughput with thread pools of these sizes")
+    parser.add_argument("--quick", action="store_true", help="small sizes and a single seed")
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--compare", metavar="BASELINE", help="flag regressions against a saved JSON run")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="relative slowdown that counts as a regression (default 0.10)")
+    parser.add_argument("--min-delta", type=float, default=MIN_DELTA,
+                        help="smallest slowdown in seconds that counts as a regression (default 0.001)")
+    args = parser.parse_args(argv)
+
+    sizes = args.sizes or (QUICK_SIZES if args.quick else DEFAULT_SIZES)
+    seeds = args.seeds or (DEFAULT_SEEDS[:1] if args.quick else DEFAULT_SEEDS)
+    results = run(sizes, seeds, args.solvers, log=print, algorithms=args.generators, threads=args.threads)
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "seeds": seeds,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold, args.min_delta)
+        for name, old, new in regressions:
+            print(f"REGRESSION {name}: {old:.4f}s -> {new:.4f}s ({new / old - 1:+.0%})")
+        if regressions:
+            return 1
+        print("No regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
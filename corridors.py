@@ -0,0 +1,169 @@
+import heapq
+import threading
+import time
+import weakref
+from solvers import SolveResult, open_neighbours, register_solver, ADVANCE
+
+
+class JunctionGraph:
+    """A maze with its corridors collapsed into weighted edges.
+
+    Nodes are the cells that don't have exactly two openings: junctions and
+    dead ends. Every run of two-opening corridor cells between two nodes
+    becomes one edge weighted by its length, remembered by its first step,
+    so a path over nodes can be walked back out into full cell coordinates.
+    Start and goal cells in the middle of a corridor are attached per query.
+    """
+
+    def __init__(self, grid):
+        start_time = time.perf_counter()
+        width = grid.width
+        walls = grid.walls
+        last_row = len(walls) - width
+        self.width = width
+        self.height = grid.height
+        self.cells = len(walls)
+        self.version = grid.version
+        self.__walls = walls
+        self.__last_row = last_row
+        nodes = self.__nodes = {}
+        for index in range(len(walls)):
+            openings = open_neighbours(walls, width, last_row, index)
+            if len(openings) != 2:
+                nodes[index] = openings
+        # Walk out every opening of every node to the node at the far end
+        adjacency = {}
+        edges = 0
+        for node, openings in nodes.items():
+            links = []
+            for first in openings:
+                end, length, _ = self.__walk(node, first, nodes)
+                links.append((end, length, first))
+                edges += 1
+            adjacency[node] = links
+        self.adjacency = self.__nodes = adjacency
+        self.edge_count = edges // 2
+        self.build_time = time.perf_counter() - start_time
+
+    @property
+    def node_count(self):
+        return len(self.adjacency)
+
+    @property
+    def compression_ratio(self):
+        """Cells per graph node; how much smaller the search space got."""
+        return self.cells / max(1, self.node_count)
+
+    def summary(self):
+        return (f"{self.cells} cells -> {self.node_count} nodes, {self.edge_count} edges "
+                f"({self.compression_ratio:.1f}x) in {self.build_time:.4f}s")
+
+    def __walk(self, origin, first, stops, collect=None):
+        # Follow a corridor from origin through first until a cell in stops
+        # (or a node) is reached. Returns (end, length, cell before end).
+        walls = self.__walls
+        width = self.width
+        last_row = self.__last_row
+        nodes = self.__nodes
+        previous, current, length = origin, first, 1
+        while current not in stops and current not in nodes and current != origin:
+            if collect is not None:
+                collect.append(current)
+            openings = open_neighbours(walls, width, last_row, current)
+            step = openings[0] if openings[0] != previous else openings[1]
+            previous, current = current, step
+            length += 1
+        return current, length, previous
+
+    def __attach(self, cell, stops):
+        # Edges from a cell to the nodes (or stop cells) at each end of its corridor
+        if cell in self.adjacency:
+            return list(self.adjacency[cell])
+        links = []
+        for first in open_neighbours(self.__walls, self.width, self.__last_row, cell):
+            end, length, _ = self.__walk(cell, first, stops)
+            links.append((end, length, first))
+        return links
+
+    def search(self, start, goal):
+        """A* over the junction graph. Returns (cell path, nodes expanded)."""
+        width = self.width
+        source = start[1] * width + start[0]
+        target = goal[1] * width + goal[0]
+        if source == target:
+            return [start], 1
+        stops = {source, target}
+        extra = {source: self.__attach(source, stops)}
+        if target not in self.adjacency:
+            # Link the cells at either end of the goal's corridor to the goal
+            for first in open_neighbours(self.__walls, width, self.__last_row, target):
+                end, length, before = self.__walk(target, first, stops)
+                if end != target:
+                    links = extra.get(end)
+                    if links is None:
+                        links = extra[end] = list(self.adjacency.get(end, ()))
+                    links.append((target, length, before))
+        goal_x, goal_y = goal
+        cost = {source: 0}
+        parent = {source: None}
+        heap = [(abs(start[0] - goal_x) + abs(start[1] - goal_y), 0, source)]
+        expanded = 0
+        while heap:
+            _, g, node = heapq.heappop(heap)
+            if g > cost[node]:
+                continue  # Stale heap entry
+            expanded += 1
+            if node == target:
+                return self.__expand(parent, target, stops), expanded
+            links = extra.get(node)
+            if links is None:
+                links = self.adjacency.get(node, ())
+            for other, length, first in links:
+                total = g + length
+                if other not in cost or total < cost[other]:
+                    cost[other] = total
+                    parent[other] = (node, first)
+                    x, y = other % width, other // width
+                    heapq.heappush(heap, (total + abs(x - goal_x) + abs(y - goal_y), total, other))
+        return [], expanded
+
+    def __expand(self, parent, target, stops):
+        legs = []
+        node = target
+        while parent[node] is not None:
+            previous, first = parent[node]
+            legs.append((previous, first, node))
+            node = previous
+        cells = [node]
+        for origin, first, end in reversed(legs):
+            self.__walk(origin, first, stops | {end}, cells)
+            cells.append(end)
+        width = self.width
+        return [(index % width, index // width) for index in cells]
+
+
+_graphs = weakref.WeakKeyDictionary()
+_graphs_lock = threading.Lock()
+
+
+def junction_graph(grid):
+    """The JunctionGraph for grid, cached until the grid's walls change."""
+    with _graphs_lock:
+        graph = _graphs.get(grid)
+        if graph is None or graph.version != grid.version:
+            graph = JunctionGraph(grid)
+            _graphs[grid] = graph
+        return graph
+
+
+def junction_astar(grid, start, goal, on_event=None):
+    """A* over the corridor-compressed graph, expanded back to full cells."""
+    start_time = time.perf_counter()
+    path, expanded = junction_graph(grid).search(tuple(start), tuple(goal))
+    if on_event is not None:
+        for a, b in zip(path, path[1:]):
+            on_event(ADVANCE, a, b)
+    return SolveResult("junction", path, expanded, time.perf_counter() - start_time)
+
+
+register_solver("junction", junction_astar)
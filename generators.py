@@ -0,0 +1,324 @@
+import random
+from array import array
+from grid import ALL, WEST, EAST, NORTH, SOUTH
+from grid import resolve_entrance, resolve_exit, entrance_wall, exit_wall
+import mazefile
+
+try:
+    import numpy as np
+except ImportError:  # Only the vectorized generators need it
+    np = None
+
+# Vectorized generators work through the grid this many cells at a time,
+# which bounds their temporary arrays on very large mazes.
+CHUNK_CELLS = 1 << 22
+
+# Generators selectable with Maze(..., algorithm=name). Each is called as
+# generate(grid, rng, start, carve_steps) on a grid with every wall up and
+# returns the number of cells carved. rng is the maze's random.Random;
+# carve_steps, when not None, collects (x, y, wall) for the animation.
+GENERATORS = {}
+
+
+def register_generator(name, generate):
+    GENERATORS[name] = generate
+
+
+def get_generator(algorithm):
+    try:
+        return GENERATORS[algorithm]
+    except KeyError:
+        raise ValueError(f"Unknown generation algorithm: {algorithm!r}. "
+                         f"Choose from backtracker, {', '.join(sorted(GENERATORS))}.") from None
+
+
+class EllerRows:
+    """Eller's algorithm as a row stream.
+
+    Iterating yields one ``bytes`` row of Walls bitmasks at a time, top to
+    bottom, holding only O(width) state however tall the maze is. seed,
+    entrance and exit mean the same as for Maze; a "random" entrance or exit
+    is resolved up front and exposed as ``entrance``/``exit_coords``.
+    Iterating again replays the same maze.
+    """
+
+    def __init__(self, width, height, seed=None, entrance=(0, 0), exit=None):
+        if width <= 0 or height <= 0:
+            raise ValueError("Maze dimensions must be positive.")
+        rng = random.Random(seed)
+        self.width = width
+        self.height = height
+        self.seed = seed
+        self.entrance = resolve_entrance(width, height, entrance, rng)
+        self.exit_coords = resolve_exit(width, height, exit, rng)
+        self.__entrance_wall = entrance_wall(self.entrance)
+        self.__exit_wall = exit_wall(width, height, self.exit_coords)
+        self.__state = rng.getstate()
+
+    def __len__(self):
+        return self.height
+
+    def __iter__(self):
+        rng = random.Random()
+        rng.setstate(self.__state)
+        width = self.width
+        last = self.height - 1
+        labels = [-1] * width
+        down = bytearray(width)
+        next_label = 0
+        for y in range(self.height):
+            row = bytearray([ALL]) * width
+            members = {}
+            for x in range(width):
+                if down[x]:
+                    row[x] &= ~NORTH
+                else:
+                    labels[x] = next_label
+                    next_label += 1
+                members.setdefault(labels[x], []).append(x)
+
+            # Join neighbouring cells from different sets; on the last row
+            # every remaining set must be joined to finish the maze.
+            for x in range(width - 1):
+                a, b = labels[x], labels[x + 1]
+                if a != b and (y == last or rng.random() < 0.5):
+                    row[x] &= ~EAST
+                    row[x + 1] &= ~WEST
+                    if len(members[a]) < len(members[b]):
+                        a, b = b, a
+                    for cell in members[b]:
+                        labels[cell] = a
+                    members[a].extend(members.pop(b))
+
+            down = bytearray(width)
+            if y < last:
+                # Every set carries on into the next row through at least one cell
+                for cells in members.values():
+                    chosen = [x for x in cells if rng.random() < 0.5]
+                    if not chosen:
+                        chosen = [rng.choice(cells)]
+                    for x in chosen:
+                        row[x] &= ~SOUTH
+                        down[x] = 1
+
+            if y == self.entrance[1]:
+                row[self.entrance[0]] &= ~self.__entrance_wall
+            if y == self.exit_coords[1]:
+                row[self.exit_coords[0]] &= ~self.__exit_wall
+            yield bytes(row)
+
+    def write(self, path):
+        """Stream the maze straight to a packed maze file at path."""
+        return mazefile.write_rows(path, self.width, self.height, self, self.seed,
+                                   self.entrance, self.exit_coords)
+
+
+def numpy_rng(rng=None):
+    """A numpy Generator from a Generator, a random.Random, an int seed or None."""
+    if np is None:
+        raise ImportError("Vectorized maze generation needs NumPy.")
+    if isinstance(rng, random.Random):
+        # Derive the stream from the maze's own generator so seeds still replay
+        return np.random.default_rng(rng.getrandbits(64))
+    return np.random.default_rng(rng)
+
+
+def _wall_rows(grid):
+    # The grid's bytearray as a writable (height, width) uint8 array, no copy
+    return np.frombuffer(grid.walls, dtype=np.uint8).reshape(grid.height, grid.width)
+
+
+def _chunk_rows(grid):
+    rows = max(1, CHUNK_CELLS // grid.width)
+    for top in range(0, grid.height, rows):
+        yield top, min(grid.height, top + rows)
+
+
+def _carve_rows(walls, top, north, east):
+    # Open north walls where north is set (and the matching south walls of
+    # the row above), and east walls where east is set, for rows top onwards.
+    bottom = top + len(north)
+    block = walls[top:bottom]
+    block &= ~(north * np.uint8(NORTH))
+    block[:, :-1] &= ~(east[:, :-1] * np.uint8(EAST))
+    block[:, 1:] &= ~(east[:, :-1] * np.uint8(WEST))
+    if top > 0:
+        walls[top - 1:bottom - 1] &= ~(north * np.uint8(SOUTH))
+    else:
+        walls[top:bottom - 1] &= ~(north[1:] * np.uint8(SOUTH))
+
+
+def _record_openings(grid, carve_steps):
+    # Vectorized generators have no carving order; sweep the result row by row
+    if carve_steps is None:
+        return
+    width = grid.width
+    walls = grid.walls
+    for index in range(len(walls)):
+        x, y = index % width, index // width
+        if y > 0 and not walls[index] & NORTH:
+            carve_steps.append((x, y, NORTH))
+        if x > 0 and not walls[index] & WEST:
+            carve_steps.append((x, y, WEST))
+
+
+def binary_tree(grid, rng=None, start=None, carve_steps=None):
+    """Binary tree maze: every cell opens north or east, chosen by coin flip.
+
+    Built with whole-array operations over row chunks. The top row becomes
+    one corridor and so does the east column.
+    """
+    rng = numpy_rng(rng)
+    walls = _wall_rows(grid)
+    width = grid.width
+    for top, bottom in _chunk_rows(grid):
+        north = rng.integers(0, 2, size=(bottom - top, width), dtype=np.uint8)
+        north[:, -1] = 1  # The east column can only go north
+        if top == 0:
+            north[0] = 0  # ... and the top row only east
+        east = 1 - north
+        _carve_rows(walls, top, north, east)
+    _record_openings(grid, carve_steps)
+    return len(grid)
+
+
+def sidewinder(grid, rng=None, start=None, carve_steps=None):
+    """Sidewinder maze: rows of east-running corridors, each with one opening north.
+
+    Runs are found with cumulative sums, so each chunk of rows is carved
+    with a handful of whole-array operations. The top row is one corridor.
+    """
+    rng = numpy_rng(rng)
+    walls = _wall_rows(grid)
+    width = grid.width
+    for top, bottom in _chunk_rows(grid):
+        rows = bottom - top
+        east = (rng.random((rows, width)) < 0.5).view(np.uint8)
+        if top == 0:
+            east[0] = 1
+        east[:, -1] = 0  # Runs end at the east wall, so they never span rows
+        # Each run ends at a cell that doesn't open east; open north from one
+        # random cell of it.
+        ends = np.flatnonzero(east.ravel() == 0)
+        starts = np.empty_like(ends)
+        starts[0] = 0
+        starts[1:] = ends[:-1] + 1
+        chosen = starts + (rng.random(len(ends)) * (ends - starts + 1)).astype(ends.dtype)
+        north = np.zeros(rows * width, dtype=np.uint8)
+        north[chosen] = 1
+        north = north.reshape(rows, width)
+        if top == 0:
+            north[0] = 0
+        _carve_rows(walls, top, north, east)
+    _record_openings(grid, carve_steps)
+    return len(grid)
+
+
+def _find(parent, index):
+    # Union-find root with full path compression
+    root = index
+    while parent[root] != root:
+        root = parent[root]
+    while parent[index] != root:
+        parent[index], index = root, parent[index]
+    return root
+
+
+def kruskal(grid, rng=random, start=None, carve_steps=None):
+    """Randomized Kruskal: open walls in shuffled order unless that makes a loop.
+
+    Uses an array-based union-find with path compression and union by rank.
+    Walls are numbered cell * 2 for a cell's east wall and cell * 2 + 1 for
+    its south wall.
+    """
+    width = grid.width
+    walls = grid.walls
+    count = len(walls)
+    last_row = count - width
+    candidates = array("I", (index * 2 + side for index in range(count) for side in (0, 1)
+                             if (index % width < width - 1 if side == 0 else index < last_row)))
+    rng.shuffle(candidates)
+    parent = array("I", range(count))
+    rank = bytearray(count)
+    joined = 1
+    for candidate in candidates:
+        if joined == count:
+            break
+        a = candidate >> 1
+        b = a + width if candidate & 1 else a + 1
+        root_a = _find(parent, a)
+        root_b = _find(parent, b)
+        if root_a == root_b:
+            continue
+        if rank[root_a] < rank[root_b]:
+            root_a, root_b = root_b, root_a
+        parent[root_b] = root_a
+        if rank[root_a] == rank[root_b]:
+            rank[root_a] += 1
+        if candidate & 1:
+            walls[a] &= ~SOUTH
+            walls[b] &= ~NORTH
+            wall = SOUTH
+        else:
+            walls[a] &= ~EAST
+            walls[b] &= ~WEST
+            wall = EAST
+        if carve_steps is not None:
+            carve_steps.append((a % width, a // width, wall))
+        joined += 1
+    return joined
+
+
+def wilson(grid, rng=random, start=(0, 0), carve_steps=None):
+    """Wilson's algorithm: a uniform spanning tree from loop-erased random walks.
+
+    The tree starts as the start cell. From each cell not yet in it, a random
+    walk runs until it meets the tree; each cell remembers only the direction
+    it was last left by, which erases loops, and the walk is then retraced
+    into the tree. All state is two bytes per cell.
+    """
+    width = grid.width
+    walls = grid.walls
+    count = len(walls)
+    last_row = count - width
+    choice = rng.choice
+    in_tree = bytearray(count)
+    heading = bytearray(count)  # Wall each walked cell was last left through
+    in_tree[start[1] * width + start[0]] = 1
+    offsets = {NORTH: -width, SOUTH: width, WEST: -1, EAST: 1}
+    opposite = {NORTH: SOUTH, SOUTH: NORTH, WEST: EAST, EAST: WEST}
+    for origin in range(count):
+        if in_tree[origin]:
+            continue
+        index = origin
+        while not in_tree[index]:
+            x = index % width
+            directions = []
+            if index >= width:
+                directions.append(NORTH)
+            if index < last_row:
+                directions.append(SOUTH)
+            if x > 0:
+                directions.append(WEST)
+            if x < width - 1:
+                directions.append(EAST)
+            direction = choice(directions)
+            heading[index] = direction
+            index += offsets[direction]
+        index = origin
+        while not in_tree[index]:
+            direction = heading[index]
+            nxt = index + offsets[direction]
+            walls[index] &= ~direction
+            walls[nxt] &= ~opposite[direction]
+            in_tree[index] = 1
+            if carve_steps is not None:
+                carve_steps.append((index % width, index // width, direction))
+            index = nxt
+    return count
+
+
+register_generator("kruskal", kruskal)
+register_generator("wilson", wilson)
+register_generator("binary_tree", binary_tree)
+register_generator("sidewinder", sidewinder)
@@ -0,0 +1,196 @@
+import random
+from enum import Flag, auto
+
+class Walls(Flag):
+    WEST = auto()    # Gets value 1 (0b0001)
+    EAST = auto()   # Gets value 2 (0b0010)
+    NORTH = auto()     # Gets value 4 (0b0100)
+    SOUTH = auto()  # Gets value 8 (0b1000)
+    ALL = WEST | EAST | NORTH | SOUTH  # Combined value: 15
+    NONE = 0
+    def __str__(self):
+        return f"Walls({self.name})"
+
+# Plain int masks for hot loops; Flag arithmetic is far too slow per cell.
+WEST = Walls.WEST.value
+EAST = Walls.EAST.value
+NORTH = Walls.NORTH.value
+SOUTH = Walls.SOUTH.value
+ALL = Walls.ALL.value
+
+# The wall on the far side of each direction
+OPPOSITE = {WEST: EAST, EAST: WEST, NORTH: SOUTH, SOUTH: NORTH}
+
+
+class Grid:
+    """Compact maze storage.
+
+    Each cell is one byte in the flat, row-major ``walls`` bytearray holding
+    its ``Walls`` bitmask, and ``visited`` is a separate bitset with one bit
+    per cell. A cell at (x, y) lives at index ``y * width + x``.
+    """
+
+    __slots__ = ("width", "height", "walls", "visited", "version", "__weakref__")
+
+    def __init__(self, width, height, walls=Walls.ALL):
+        if width <= 0 or height <= 0:
+            raise ValueError("Grid dimensions must be positive.")
+        self.width = width
+        self.height = height
+        self.walls = bytearray([Walls(walls).value]) * (width * height)
+        self.visited = bytearray((width * height + 7) >> 3)
+        self.version = 0
+
+    @classmethod
+    def from_walls(cls, width, height, walls):
+        """Wrap existing wall storage: any indexable, assignable byte sequence."""
+        if len(walls) != width * height:
+            raise ValueError("Wall data does not match the grid dimensions.")
+        grid = cls.__new__(cls)
+        grid.width = width
+        grid.height = height
+        grid.walls = walls
+        grid.visited = bytearray((width * height + 7) >> 3)
+        grid.version = 0
+        return grid
+
+    def __len__(self):
+        return self.width * self.height
+
+    @property
+    def nbytes(self):
+        return len(self.walls) + len(self.visited)
+
+    def index(self, x, y):
+        return y * self.width + x
+
+    def location(self, index):
+        y, x = divmod(index, self.width)
+        return (x, y)
+
+    def in_bounds(self, x, y):
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    @property
+    def frozen(self):
+        return isinstance(self.walls, bytes)
+
+    def freeze(self):
+        """Make the walls read-only, so one grid can be searched from many threads.
+
+        Solvers keep their own per-call state and only read the walls; a
+        frozen grid guarantees nothing changes them mid-search.
+        """
+        if not self.frozen:
+            self.walls = bytes(self.walls)
+
+    def __check_writable(self):
+        if self.frozen:
+            raise ValueError("Grid is frozen; its walls can't change.")
+
+    def changed(self):
+        """Note a wall change so anything derived from the walls is rebuilt.
+
+        The Grid methods call this themselves; code writing to ``walls``
+        directly after a maze is built must call it too.
+        """
+        self.version += 1
+
+    def get_walls(self, x, y):
+        return Walls(self.walls[y * self.width + x])
+
+    def set_walls(self, x, y, walls):
+        self.__check_writable()
+        self.walls[y * self.width + x] = Walls(walls).value
+        self.version += 1
+
+    def has_wall(self, x, y, wall):
+        return bool(self.walls[y * self.width + x] & Walls(wall).value)
+
+    def set_wall(self, x, y, wall, present=True):
+        self.__check_writable()
+        index = y * self.width + x
+        if present:
+            self.walls[index] |= Walls(wall).value
+        else:
+            self.walls[index] &= ~Walls(wall).value
+        self.version += 1
+
+    def carve(self, a, b):
+        """Remove the wall between the adjacent cells at flat indices a and b."""
+        self.__check_writable()
+        width = self.width
+        if b == a - width:
+            self.walls[a] &= ~NORTH
+            self.walls[b] &= ~SOUTH
+        elif b == a + width:
+            self.walls[a] &= ~SOUTH
+            self.walls[b] &= ~NORTH
+        elif b == a - 1 and a % width:
+            self.walls[a] &= ~WEST
+            self.walls[b] &= ~EAST
+        elif b == a + 1 and b % width:
+            self.walls[a] &= ~EAST
+            self.walls[b] &= ~WEST
+        else:
+            raise ValueError("Cells are not adjacent.")
+        self.version += 1
+
+    def is_visited(self, index):
+        return bool(self.visited[index >> 3] & (1 << (index & 7)))
+
+    def set_visited(self, index, visited=True):
+        if visited:
+            self.visited[index >> 3] |= 1 << (index & 7)
+        else:
+            self.visited[index >> 3] &= ~(1 << (index & 7))
+
+    def reset_visited(self):
+        self.visited[:] = bytes(len(self.visited))
+
+
+def resolve_entrance(width, height, entrance=(0, 0), rng=random):
+    """Turn an entrance argument (coordinates or "random") into coordinates."""
+    # If entrance is "random", pick a random position on top row or west side
+    if entrance == "random":
+        if rng.choice([True, False]):  # Choose top row
+            entrance = (rng.randint(0, width - 1), 0)
+        else:  # Choose west side
+            entrance = (0, rng.randint(0, height - 1))
+    if entrance[0] < 0 or entrance[0] >= width or entrance[1] < 0 or entrance[1] >= height:
+        raise ValueError("Entrance coordinates must be within the maze dimensions.")
+    return tuple(entrance)
+
+
+def resolve_exit(width, height, exit=None, rng=random):
+    """Turn an exit argument (coordinates, "random" or None) into coordinates."""
+    if exit == "random":
+        if rng.choice([True, False]):  # Choose bottom row
+            exit = (rng.randint(0, width - 1), height - 1)
+        else:  # Choose east side
+            exit = (width - 1, rng.randint(0, height - 1))
+    if exit is None:
+        return (width - 1, height - 1)
+    if exit[0] < 0 or exit[0] >= width or exit[1] < 0 or exit[1] >= height:
+        raise ValueError("Exit coordinates must be within the maze dimensions.")
+    return tuple(exit)
+
+
+def entrance_wall(entrance):
+    """The outer wall broken for an entrance on the top row or west side."""
+    # Allow entrance on any position on the top row or west side
+    if entrance[1] == 0:  # Top row
+        return NORTH
+    if entrance[0] == 0:  # West side
+        return WEST
+    raise ValueError("Entrance must be on the top row or west side.")
+
+
+def exit_wall(width, height, exit):
+    """The outer wall broken for an exit on the bottom row or east side."""
+    # Allow exit on any position on the bottom row or east side
+    if exit[1] == height - 1:  # Bottom row
+        return SOUTH
+    if exit[0] == width - 1:  # East side
+        return EAST
+    raise ValueError("Exit must be on the bottom row or east side.")
@@ -0,0 +1,116 @@
+import cProfile
+from contextlib import contextmanager
+
+
+class MazeStats:
+    """Counters and timers for one maze, filled in as it is carved, solved and drawn.
+
+    Carve and solve figures describe the most recent run of each. Drawing
+    figures (canvas items, redraws, frames, time drawing and time waiting on
+    the event loop) accumulate over the maze's lifetime, measured against
+    the window and animation scheduler it was created with.
+    """
+
+    def __init__(self, window=None, animation=None):
+        self.cells_carved = 0
+        self.max_stack_depth = 0
+        self.carve_time = 0.0
+        self.solver = None
+        self.nodes_expanded = 0
+        self.backtracks = 0
+        self.path_length = 0
+        self.solve_time = 0.0
+        self.draw_lines = 0
+        self.redraws = 0
+        self.frames = 0
+        self.draw_time = 0.0
+        self.wait_time = 0.0
+        self.__window = window
+        self.__animation = animation
+        self.__baseline = self.__counters()
+
+    def __counters(self):
+        return (getattr(self.__window, "items_created", 0),
+                getattr(self.__window, "redraw_count", 0),
+                getattr(self.__animation, "frames", 0),
+                getattr(self.__animation, "draw_time", 0.0),
+                getattr(self.__animation, "wait_time", 0.0))
+
+    def record_carve(self, cells_carved, max_stack_depth, carve_time):
+        self.cells_carved = cells_carved
+        self.max_stack_depth = max_stack_depth
+        self.carve_time = carve_time
+        self.refresh()
+
+    def record_solve(self, result):
+        self.solver = result.algorithm
+        self.nodes_expanded = result.nodes_expanded
+        self.backtracks = result.backtracks
+        self.path_length = len(result.path)
+        self.solve_time = result.elapsed
+        self.refresh()
+
+    def refresh(self):
+        """Bring the drawing figures up to date with the window and scheduler."""
+        now = self.__counters()
+        (self.draw_lines, self.redraws, self.frames,
+         self.draw_time, self.wait_time) = (a - b for a, b in zip(now, self.__baseline))
+
+    @property
+    def compute_time(self):
+        """Seconds spent carving and searching, excluding any drawing."""
+        return self.carve_time + self.solve_time
+
+    def as_dict(self):
+        return {
+            "cells_carved": self.cells_carved,
+            "max_stack_depth": self.max_stack_depth,
+            "carve_time": self.carve_time,
+            "solver": self.solver,
+            "nodes_expanded": self.nodes_expanded,
+            "backtracks": self.backtracks,
+            "path_length": self.path_length,
+            "solve_time": self.solve_time,
+            "draw_lines": self.draw_lines,
+            "redraws": self.redraws,
+            "frames": self.frames,
+            "draw_time": self.draw_time,
+            "wait_time": self.wait_time,
+            "compute_time": self.compute_time,
+        }
+
+    def summary(self):
+        """One line suitable for printing after each maze."""
+        return (f"carved {self.cells_carved} cells (depth {self.max_stack_depth}) in {self.carve_time:.4f}s | "
+                f"{self.solver or 'unsolved'}: {self.nodes_expanded} nodes, {self.backtracks} backtracks, "
+                f"path {self.path_length} in {self.solve_time:.4f}s | "
+                f"{self.draw_lines} lines, {self.redraws} redraws, {self.frames} frames | "
+                f"compute {self.compute_time:.3f}s, draw {self.draw_time:.3f}s, wait {self.wait_time:.3f}s")
+
+    def __repr__(self):
+        return f"MazeStats({self.summary()})"
+
+
+def cprofile_hook(profile=None):
+    """A solve hook that runs cProfile around every Maze.solve() call.
+
+    The profiler is available as hook.profile once solves have run::
+
+        hook = cprofile_hook()
+        maze.add_solve_hook(hook)
+        maze.solve()
+        hook.profile.print_stats("cumulative")
+    """
+    if profile is None:
+        profile = cProfile.Profile()
+
+    @contextmanager
+    def hook(maze, algorithm):
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+
+    hook.profile = profile
+    return hook
@@ -0,0 +1,131 @@
+from array import array
+from Graphics import Line
+from grid import WEST, EAST, NORTH, SOUTH
+
+WALLS = "walls"
+SOLUTION = "solution"
+BACKTRACK = "backtrack"
+OVERLAYS = (SOLUTION, BACKTRACK)
+
+# Wall slot states; UNKNOWN forces the next draw to set the item
+HIDDEN, SHOWN, UNKNOWN = 0, 1, 2
+
+
+class CanvasLayers:
+    """Long-lived canvas items for drawing maze after maze in one window.
+
+    Every wall slot (the north edge of each cell plus one more row, the west
+    edge of each cell plus one more column) gets one line item, created the
+    first time a maze of that size is drawn and from then on only shown or
+    hidden with itemconfigure. Solution and backtrack lines sit on their own
+    tagged layers, drawn from pools of items that clear() hides for reuse.
+    After the first maze of a given size, drawing another creates no items.
+
+    Pass one CanvasLayers to every Maze made for the window.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.__geometry = None
+        self.__wall_items = array("I")
+        self.__horizontal = 0  # Slots before this index are horizontal
+        self.__shown = bytearray()
+        self.__pools = {tag: [] for tag in OVERLAYS}
+        self.__used = {tag: 0 for tag in OVERLAYS}
+
+    @property
+    def item_count(self):
+        return len(self.__wall_items) + sum(len(pool) for pool in self.__pools.values())
+
+    def __layout(self, width, height, cellwidth, cellheight, buffer):
+        # Put the slot items where a maze of this size and geometry needs them
+        window = self.window
+        items = self.__wall_items
+        horizontal = width * (height + 1)
+        needed = horizontal + (width + 1) * height
+        lines = []
+        for y in range(height + 1):
+            py = y * cellheight + buffer
+            for x in range(width):
+                lines.append(Line(x * cellwidth + 1 + buffer, py, (x + 1) * cellwidth + 1 + buffer, py))
+        for y in range(height):
+            top = y * cellheight + buffer
+            for x in range(width + 1):
+                px = x * cellwidth + 1 + buffer
+                lines.append(Line(px, top, px, top + cellheight))
+        for slot, line in enumerate(lines):
+            if slot < len(items):
+                window.updateItem(items[slot], line)
+            else:
+                items.append(window.createLine(line, tags=(WALLS,)))
+        for slot in range(needed, len(items)):
+            window.updateItem(items[slot], state="hidden")
+        # New wall items would otherwise cover the overlays
+        for tag in OVERLAYS:
+            if self.__pools[tag]:
+                window.raiseTag(tag)
+        self.__horizontal = horizontal
+        self.__shown = bytearray([UNKNOWN]) * needed
+        self.__geometry = (width, height, cellwidth, cellheight, buffer)
+
+    def draw_walls(self, grid, cellwidth, cellheight, buffer):
+        """Show exactly the walls of grid, touching only slots that changed."""
+        width = grid.width
+        height = grid.height
+        if self.__geometry != (width, height, cellwidth, cellheight, buffer):
+            self.__layout(width, height, cellwidth, cellheight, buffer)
+        walls = grid.walls
+        for y in range(height + 1):
+            above = (y - 1) * width
+            below = y * width
+            for x in range(width):
+                present = ((y < height and walls[below + x] & NORTH) or
+                           (y > 0 and walls[above + x] & SOUTH))
+                self.__show(y * width + x, present)
+        horizontal = self.__horizontal
+        for y in range(height):
+            row = y * width
+            for x in range(width + 1):
+                present = ((x < width and walls[row + x] & WEST) or
+                           (x > 0 and walls[row + x - 1] & EAST))
+                self.__show(horizontal + y * (width + 1) + x, present)
+
+    def set_wall(self, x, y, wall, present):
+        """Show or hide the wall on one side of cell (x, y)."""
+        width = self.__geometry[0]
+        if wall == NORTH:
+            slot = y * width + x
+        elif wall == SOUTH:
+            slot = (y + 1) * width + x
+        elif wall == WEST:
+            slot = self.__horizontal + y * (width + 1) + x
+        else:
+            slot = self.__horizontal + y * (width + 1) + x + 1
+        self.__show(slot, present)
+
+    def __show(self, slot, present):
+        state = SHOWN if present else HIDDEN
+        if self.__shown[slot] != state:
+            self.__shown[slot] = state
+            self.window.updateItem(self.__wall_items[slot], state="normal" if present else "hidden")
+
+    def add_line(self, tag, line, fill_color):
+        """Draw line on an overlay layer, reusing a cleared item when there is one."""
+        pool = self.__pools[tag]
+        used = self.__used[tag]
+        if used < len(pool):
+            self.window.updateItem(pool[used], line, fill=fill_color, state="normal")
+            # A reused item keeps its old place in the stacking order; bring it
+            # to the top, as a new line would be, so a later backtrack still
+            # covers the advance it undoes (and a final path its explores)
+            self.window.raiseTag(pool[used])
+        else:
+            pool.append(self.window.createLine(line, fill_color, tags=(tag,)))
+        self.__used[tag] = used + 1
+
+    def clear(self, *tags):
+        """Hide the given overlay layers (default: all of them) for reuse."""
+        for tag in tags or OVERLAYS:
+            if self.__used[tag]:
+                self.window.setTagState(tag, hidden=True)
+                self.__used[tag] = 0
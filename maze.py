@@ -1,336 +1,687 @@
 import time
 import random
+import threading
+from array import array
+from collections import OrderedDict
+from contextlib import ExitStack
 from Graphics import Window, Point, Line
-from enum import Flag, auto
-
-class Walls(Flag):
-    WEST = auto()    # Gets value 1 (0b0001)
-    EAST = auto()   # Gets value 2 (0b0010)
-    NORTH = auto()     # Gets value 4 (0b0100)
-    SOUTH = auto()  # Gets value 8 (0b1000)
-    ALL = WEST | EAST | NORTH | SOUTH  # Combined value: 15
-    NONE = 0
-    def __str__(self):
-        return f"Walls({self.name})"
+from grid import Walls, Grid, WEST, EAST, NORTH, SOUTH
+from grid import resolve_entrance, resolve_exit, entrance_wall, exit_wall
+from solvers import SolveResult, DistanceField, get_solver, ADVANCE
+from animation import AnimationScheduler
+from generators import get_generator
+import mazefile
+from instrumentation import MazeStats
+from treeindex import TreeIndex
+from raster import MazeRaster
+from layers import SOLUTION, BACKTRACK
+import corridors
+
+# How many distance fields (one per source) a maze keeps cached
+DISTANCE_FIELD_CACHE_SIZE = 4
 
 class Cell:
-    
-    visited = False
+    """A view of one cell in a Grid.
 
-    def __init__(self, window = None, x=0, y=0, cellwidth = 20, cellheight = 20, walls=Walls.ALL, buffer=50):
-        self.has_west_wall  = bool(walls & Walls.WEST)
-        self.has_east_wall  = bool(walls & Walls.EAST)
-        self.has_north_wall = bool(walls & Walls.NORTH)
-        self.has_south_wall = bool(walls & Walls.SOUTH)
+    Views are cheap and created on demand; the wall and visited state live in
+    the grid, so changes made through any view are seen by all of them. A
+    Cell built without a grid owns a private 1x1 grid and draws itself
+    straight away, as before.
+    """
+
+    def __init__(self, window = None, x=0, y=0, cellwidth = 20, cellheight = 20, walls=Walls.ALL, buffer=50, grid=None):
+        if grid is None:
+            self.__grid = Grid(1, 1, walls)
+            self.__index = 0
+        else:
+            self.__grid = grid
+            self.__index = grid.index(x, y)
         self.__x = x
         self.__y = y
         self.cellwidth = cellwidth
         self.cellheight = cellheight
-        self.__nw_corner = Point(x * self.cellwidth + 1 + buffer, y * self.cellheight + buffer)
-        self.__se_corner = Point((x + 1) * self.cellwidth + 1 + buffer, (y + 1) * self.cellheight + buffer)
-        self.__ne_corner = Point((x + 1) * self.cellwidth + 1 + buffer, y * self.cellheight + buffer)
-        self.__sw_corner = Point(x * self.cellwidth + 1 + buffer, (y + 1) * self.cellheight + buffer)
+        self.__buffer = buffer
         if window != None:
             self.__window = window
         else:
             self.__window = None
-        self.draw()
+        if grid is None:
+            self.draw()
 
-    def draw(self):
+    def __eq__(self, other):
+        if not isinstance(other, Cell):
+            return NotImplemented
+        return self.__grid is other.__grid and self.__index == other.__index
+
+    def __hash__(self):
+        return hash((id(self.__grid), self.__index))
+
+    def __get_wall(self, wall):
+        return bool(self.__grid.walls[self.__index] & wall)
+
+    def __set_wall(self, wall, present):
+        if self.__grid.frozen:
+            raise ValueError("Grid is frozen; its walls can't change.")
+        if present:
+            self.__grid.walls[self.__index] |= wall
+        else:
+            self.__grid.walls[self.__index] &= ~wall
+        self.__grid.changed()
+
+    has_west_wall = property(lambda self: self.__get_wall(WEST),
+                             lambda self, value: self.__set_wall(WEST, value))
+    has_east_wall = property(lambda self: self.__get_wall(EAST),
+                             lambda self, value: self.__set_wall(EAST, value))
+    has_north_wall = property(lambda self: self.__get_wall(NORTH),
+                              lambda self, value: self.__set_wall(NORTH, value))
+    has_south_wall = property(lambda self: self.__get_wall(SOUTH),
+                              lambda self, value: self.__set_wall(SOUTH, value))
+
+    @property
+    def walls(self):
+        return Walls(self.__grid.walls[self.__index])
+
+    @property
+    def visited(self):
+        return self.__grid.is_visited(self.__index)
+
+    @visited.setter
+    def visited(self, value):
+        self.__grid.set_visited(self.__index, value)
+
+    def draw(self, redraw=True):
         if self.__window is None:
             return
-        
-        # Draw West wall
-        line = Line(self.__nw_corner, self.__sw_corner)
-        if self.has_west_wall:
-            self.__window.drawLine(line)
-        else:
-            self.__window.drawLine(line, fill_color="white")
-        # Draw the East wall
-        line = Line(self.__ne_corner, self.__se_corner)
-        if self.has_east_wall:
-            self.__window.drawLine(line)
-        else:
-            self.__window.drawLine(line, fill_color="white")
-        # Draw the North wall
-        line = Line(self.__nw_corner, self.__ne_corner)
-        if self.has_north_wall:
-            self.__window.drawLine(line)
-        else:
-            self.__window.drawLine(line, fill_color="white")
-        # Draw the South wall
-        line = Line(self.__sw_corner, self.__se_corner)
-        if self.has_south_wall:
-            self.__window.drawLine(line)
-        else:
-            self.__window.drawLine(line, fill_color="white")
+
+        x = self.__x
+        y = self.__y
+        buffer = self.__buffer
+        nw_corner = Point(x * self.cellwidth + 1 + buffer, y * self.cellheight + buffer)
+        se_corner = Point((x + 1) * self.cellwidth + 1 + buffer, (y + 1) * self.cellheight + buffer)
+        ne_corner = Point((x + 1) * self.cellwidth + 1 + buffer, y * self.cellheight + buffer)
+        sw_corner = Point(x * self.cellwidth + 1 + buffer, (y + 1) * self.cellheight + buffer)
+
+        walls = []
+        erased = []
+        # West, East, North and South walls; missing ones are drawn in white
+        for present, line in ((self.has_west_wall, Line(nw_corner, sw_corner)),
+                              (self.has_east_wall, Line(ne_corner, se_corner)),
+                              (self.has_north_wall, Line(nw_corner, ne_corner)),
+                              (self.has_south_wall, Line(sw_corner, se_corner))):
+            (walls if present else erased).append(line)
+        # Erase first so the remaining walls keep their corners
+        self.__window.drawLines(erased, fill_color="white", redraw=False)
+        self.__window.drawLines(walls, redraw=False)
+        if redraw:
+            self.__window.redraw()
     
     def get_location(self):
         return (self.__x, self.__y)
 
-    def draw_to_cell(self, other_cell, backtrack = False, buffer=50):
+    def draw_to_cell(self, other_cell, backtrack = False, buffer=None, redraw=True):
         if other_cell is None or not isinstance(other_cell, Cell):
             raise ValueError("other_cell must be a valid Cell instance.")
         if self.__window is None:
             return
+        if buffer is None:
+            buffer = self.__buffer
         color = "red" if not backtrack else "gray"
         line = Line(self.__x * self.cellwidth + self.cellwidth // 2 + buffer,
                     self.__y * self.cellheight + self.cellheight // 2 + buffer,
                     other_cell.__x * self.cellwidth + self.cellwidth // 2 + buffer,
                     other_cell.__y * self.cellheight + self.cellheight // 2 + buffer)
-        self.__window.drawLine(line, fill_color=color)
+        self.__window.drawLine(line, fill_color=color, redraw=redraw)
 
-class Maze:
-    def __init__(self, window=None, width=2, height=3, cellwidth = 20, cellheight = 20, buffer=50, entrance=(0,0), exit=None, seed=None, check_interrupt=None):
-        if window != None:
-            self.__window = window
-        else:
-            self.__window = None
-        
-        if seed != None:
-            random.seed(seed)
-        else:
-            random.seed()
+def wall_segments(grid, cellwidth=20, cellheight=20, buffer=50):
+    """All walls of grid as Lines, with collinear runs merged into one segment.
+
+    A wall slot is drawn when either cell on its sides has that wall, the
+    same as drawing every cell, but a row of n touching walls becomes one
+    Line instead of 2n.
+    """
+    width = grid.width
+    height = grid.height
+    walls = grid.walls
+    segments = []
+    # Horizontal lines, one per row boundary
+    for y in range(height + 1):
+        above = (y - 1) * width
+        below = y * width
+        py = y * cellheight + buffer
+        run_start = None
+        for x in range(width + 1):
+            present = x < width and ((y < height and walls[below + x] & NORTH) or
+                                     (y > 0 and walls[above + x] & SOUTH))
+            if present and run_start is None:
+                run_start = x
+            elif not present and run_start is not None:
+                segments.append(Line(run_start * cellwidth + 1 + buffer, py, x * cellwidth + 1 + buffer, py))
+                run_start = None
+    # Vertical lines, one per column boundary
+    for x in range(width + 1):
+        px = x * cellwidth + 1 + buffer
+        run_start = None
+        for y in range(height + 1):
+            present = y < height and ((x < width and walls[y * width + x] & WEST) or
+                                      (x > 0 and walls[y * width + x - 1] & EAST))
+            if present and run_start is None:
+                run_start = y
+            elif not present and run_start is not None:
+                segments.append(Line(px, run_start * cellheight + buffer, px, y * cellheight + buffer))
+                run_start = None
+    return segments
 
+
+class _CellRow:
+    # One row of on-demand Cell views, so maze._Maze__cells[y][x] still works.
+    def __init__(self, make_cell, y, width):
+        self.__make_cell = make_cell
+        self.__y = y
+        self.__width = width
+
+    def __len__(self):
+        return self.__width
+
+    def __getitem__(self, x):
+        if x < 0:
+            x += self.__width
+        if not 0 <= x < self.__width:
+            raise IndexError("Cell index out of bounds")
+        return self.__make_cell(x, self.__y)
+
+    def __iter__(self):
+        for x in range(self.__width):
+            yield self.__make_cell(x, self.__y)
+
+
+class _CellRows:
+    def __init__(self, make_cell, width, height):
+        self.__make_cell = make_cell
         self.__width = width
         self.__height = height
-        self.__cells = [[Cell(window, x, y, cellwidth, cellheight) for x in range(width)] for y in range(height)]
-        
-        # If entrance is "random", pick a random position on top row or west side
-        if entrance == "random":
-            if random.choice([True, False]):  # Choose top row
-                entrance = (random.randint(0, width - 1), 0)
-            else:  # Choose west side
-                entrance = (0, random.randint(0, height - 1))
-        
-        if entrance[0] < 0 or entrance[0] >= width or entrance[1] < 0 or entrance[1] >= height:
-            raise ValueError("Entrance coordinates must be within the maze dimensions.")
-        self.entrance = entrance
-        
-        # Handle exit positioning
-        if exit == "random":
-            if random.choice([True, False]):  # Choose bottom row
-                exit = (random.randint(0, width - 1), height - 1)
-            else:  # Choose east side
-                exit = (width - 1, random.randint(0, height - 1))
+
+    def __len__(self):
+        return self.__height
+
+    def __getitem__(self, y):
+        if y < 0:
+            y += self.__height
+        if not 0 <= y < self.__height:
+            raise IndexError("Row index out of bounds")
+        return _CellRow(self.__make_cell, y, self.__width)
+
+    def __iter__(self):
+        for y in range(self.__height):
+            yield _CellRow(self.__make_cell, y, self.__width)
+
+
+class Maze:
+    def __init__(self, window=None, width=2, height=3, cellwidth = 20, cellheight = 20, buffer=50, entrance=(0,0), exit=None, seed=None, check_interrupt=None, animation=None, instrument=False, algorithm="backtracker", layers=None, record_carving=False):
+        # Each maze draws from its own generator, so mazes built side by
+        # side (or in other processes) don't disturb each other's sequence.
+        self.__rng = random.Random(seed)
+        generate = None if algorithm == "backtracker" else get_generator(algorithm)
+
+        self.seed = seed
+        self.algorithm = algorithm
+        self.__setup(window, Grid(width, height), cellwidth, cellheight, buffer, check_interrupt, animation, instrument, layers)
+        self.draw()
         
-        if exit is not None:
-            if exit[0] < 0 or exit[0] >= width or exit[1] < 0 or exit[1] >= height:
-                raise ValueError("Exit coordinates must be within the maze dimensions.")
-            self.exit = self.__cells[exit[1]][exit[0]]
-            self.exit_coords = exit
-        else:
-            self.exit = self.__cells[height - 1][width - 1]
-            self.exit_coords = (width - 1, height - 1)
+        entrance = resolve_entrance(width, height, entrance, self.__rng)
+        self.__set_openings(entrance, resolve_exit(width, height, exit, self.__rng))
         
-        self.__buffer = buffer
-        self.__check_interrupt = check_interrupt
+        # Carving runs at full speed; with a window the opened walls are
+        # recorded and played back through the animation scheduler afterwards.
+        # record_carving keeps them for show() when there is no window yet.
+        self.__carve_steps = [] if self.__window is not None or record_carving else None
         self.__break_entrance()
         self.__break_exit()
         self.__reset_visited()
-        self.__break_walls_r(entrance[0], entrance[1])
+        if generate is None:
+            self.__break_walls(entrance[0], entrance[1])
+        else:
+            self.__generate(generate, entrance)
+        if self.__carve_steps is not None:
+            steps, self.__carve_steps = self.__carve_steps, None
+            if self.__window is not None:
+                self.__play(steps, lambda step: self.__erase_wall(*step))
+            else:
+                self.__recorded_steps = steps
+        if self.stats is not None:
+            self.stats.record_carve(self.cells_carved, self.max_stack_depth, self.carve_time)
+
+    def show(self, window, check_interrupt=None, animation=None, layers=None):
+        """Put a maze built without a window (say on a worker thread) on window.
+
+        If it was built with record_carving=True the carving is played back
+        just as if it had been built on the window; otherwise it is drawn
+        finished.
+        """
+        self.__window = window
+        self.__check_interrupt = check_interrupt
+        self.__layers = layers
+        if animation is not None:
+            self.__animation = animation
+        self.exit = self.get_cell(*self.exit_coords)
+        if self.stats is not None:
+            # Drawing is measured from now, against the new window
+            self.stats = MazeStats(window, self.__animation)
+        steps, self.__recorded_steps = self.__recorded_steps, None
+        if steps is None:
+            self.draw()
+        else:
+            self.__draw_walls(Grid(self.__width, self.__height))
+            self.__play(steps, lambda step: self.__erase_wall(*step))
+        if self.stats is not None:
+            self.stats.record_carve(self.cells_carved, self.max_stack_depth, self.carve_time)
     
+    def __setup(self, window, grid, cellwidth, cellheight, buffer, check_interrupt, animation, instrument, layers=None):
+        self.__window = window
+        self.__layers = layers
+        self.__width = grid.width
+        self.__height = grid.height
+        self.__cellwidth = cellwidth
+        self.__cellheight = cellheight
+        self.__buffer = buffer
+        self.__grid = grid
+        self.__cells = _CellRows(self.__make_cell, grid.width, grid.height)
+        self.__check_interrupt = check_interrupt
+        if animation is None:
+            animation = AnimationScheduler(max_duration=5.0)
+        self.__animation = animation
+        self.__carve_steps = None
+        self.__recorded_steps = None
+        self.cells_carved = 0
+        self.carve_time = 0.0
+        self.max_stack_depth = 0
+        self.solution = None
+        self.stats = MazeStats(window, animation) if instrument else None
+        self.__solve_hooks = []
+        self.__tree_index = None
+        self.__distance_fields = OrderedDict()
+        # Guards the derived-data caches when solves run on several threads
+        self.__cache_lock = threading.Lock()
+
+    def __set_openings(self, entrance, exit):
+        self.entrance = entrance
+        self.exit_coords = exit
+        self.exit = self.get_cell(*exit)
+
+    def save(self, path, solution=None):
+        """Write the maze to path in the packed maze file format.
+
+        solution, a SolveResult or a list of (x, y) cells, is stored in the
+        file's trailing section when given.
+        """
+        width = self.__width
+        if solution is not None:
+            path_cells = solution.path if isinstance(solution, SolveResult) else solution
+            solution = [y * width + x for x, y in path_cells]
+        mazefile.save(path, width, self.__height, self.__grid.walls, self.seed,
+                      self.entrance, self.exit_coords, solution)
+
+    def export_image(self, path, solution=None, cellwidth=None, cellheight=None, buffer=None):
+        """Write the maze to a .png or .ppm image, no window needed.
+
+        solution, a SolveResult or a list of (x, y) cells, is drawn over it.
+        Geometry defaults to the maze's own.
+        """
+        if isinstance(solution, SolveResult):
+            solution = solution.path
+        MazeRaster(self.__grid,
+                   self.__cellwidth if cellwidth is None else cellwidth,
+                   self.__cellheight if cellheight is None else cellheight,
+                   self.__buffer if buffer is None else buffer,
+                   solution).save(path)
+
+    @classmethod
+    def load(cls, path, window=None, cellwidth=20, cellheight=20, buffer=50, check_interrupt=None, animation=None, lazy=True, instrument=False, layers=None):
+        """Open a maze written by save().
+
+        The file is memory-mapped; with lazy true cells are decoded as they
+        are read. A stored solution is available as maze.solution.
+        """
+        header, walls, solution = mazefile.load(path, lazy)
+        maze = cls.__new__(cls)
+        maze.seed = header.seed
+        maze.algorithm = None
+        maze.__setup(window, Grid.from_walls(header.width, header.height, walls),
+                     cellwidth, cellheight, buffer, check_interrupt, animation, instrument, layers)
+        maze.__set_openings(header.entrance, header.exit)
+        if solution is not None:
+            maze.solution = [(index % header.width, index // header.width) for index in solution]
+        maze.draw()
+        return maze
+
     def draw(self):
-        for row in self.__cells:
-            for cell in row:
-                cell.draw()
+        """Draw the whole maze in one batch with a single redraw.
+
+        Whatever was on the maze area is painted over with one white
+        rectangle, then the walls go down as merged segments, so no
+        per-cell erase lines are needed. With CanvasLayers the existing wall
+        items are shown or hidden instead, creating nothing new.
+        """
+        self.__draw_walls(self.__grid)
+
+    def __draw_walls(self, grid):
+        if self.__window is None:
+            return
+        if self.__layers is not None:
+            self.__layers.draw_walls(grid, self.__cellwidth, self.__cellheight, self.__buffer)
+            self.__window.redraw()
+            if self.stats is not None:
+                self.stats.refresh()
+            return
+        buffer = self.__buffer
+        self.__window.fillRect(buffer, buffer - 1,
+                               self.__width * self.__cellwidth + 2 + buffer,
+                               self.__height * self.__cellheight + 1 + buffer,
+                               redraw=False)
+        self.__window.drawLines(wall_segments(grid, self.__cellwidth, self.__cellheight, buffer))
+        if self.stats is not None:
+            self.stats.refresh()
 
     def clear(self):
+        """Remove the solution drawing; with CanvasLayers the items are kept for reuse."""
         if self.__window is None:
             return
+        if self.__layers is not None:
+            self.__layers.clear()
+            self.__window.redraw()
+            return
         self.__window.clear()
         
     
     def get_cell(self, x, y):
-        return self.__cells[y][x] if 0 <= x < self.__width and 0 <= y < self.__height else None
+        return self.__make_cell(x, y) if 0 <= x < self.__width and 0 <= y < self.__height else None
+
+    @property
+    def grid(self):
+        return self.__grid
+
+    def __make_cell(self, x, y):
+        return Cell(self.__window, x, y, self.__cellwidth, self.__cellheight,
+                    buffer=self.__buffer, grid=self.__grid)
     
     def _create_cells(self):
-        self.__cells = [[Cell(self.__window, x, y) for x in range(self.__width)] for y in range(self.__height)]
+        self.__grid = Grid(self.__width, self.__height)
     
     def _draw_cells(self):
-        for row in self.__cells:
-            for cell in row:
-                cell.draw()
-
-    def __draw_cell(self, i, j):
-        if 0 <= i < self.__width and 0 <= j < self.__height:
-            self.__cells[j][i].draw()
-            self.__animate(0.0)
-        else:
-            raise IndexError("Cell index out of bounds")
+        self.draw()
 
-    def __animate(self, delay=0.05):
-        if self.__window is None:
+    def __erase_wall(self, i, j, wall):
+        if self.__layers is not None:
+            self.__layers.set_wall(i, j, wall, False)
             return
-        if self.__check_interrupt and not self.__check_interrupt():
-            raise InterruptedError("Animation interrupted")
-        self.__window.redraw()
-        time.sleep(delay)
+        # Draw a single white line over one side of a cell
+        left = i * self.__cellwidth + 1 + self.__buffer
+        top = j * self.__cellheight + self.__buffer
+        right = left + self.__cellwidth
+        bottom = top + self.__cellheight
+        if wall == NORTH:
+            line = Line(left, top, right, top)
+        elif wall == SOUTH:
+            line = Line(left, bottom, right, bottom)
+        elif wall == WEST:
+            line = Line(left, top, left, bottom)
+        else:
+            line = Line(right, top, right, bottom)
+        self.__window.drawLine(line, fill_color="white", redraw=False)
+
+    def __play(self, steps, draw):
+        self.__animation.play(self.__window, steps, draw, self.__check_interrupt)
 
     def __break_entrance(self):
-        # Allow entrance on any position on the top row or west side
-        if self.entrance[1] == 0:  # Top row
-            self.__cells[0][self.entrance[0]].has_north_wall = False
-            self.__cells[0][self.entrance[0]].draw()
-            self.__draw_cell(self.entrance[0], 0)
-        elif self.entrance[0] == 0:  # West side
-            self.__cells[self.entrance[1]][0].has_west_wall = False
-            self.__cells[self.entrance[1]][0].draw()
-            self.__draw_cell(0, self.entrance[1])
-        else:
-            raise ValueError("Entrance must be on the top row or west side.")
+        x, y = self.entrance
+        wall = entrance_wall(self.entrance)
+        self.__grid.walls[self.__grid.index(x, y)] &= ~wall
+        if self.__carve_steps is not None:
+            self.__carve_steps.append((x, y, wall))
 
-    def __break_exit(self, exit=None):
-        # Use the stored exit coordinates
-        exit_x, exit_y = self.exit_coords
-        
-        # Allow exit on any position on the bottom row or east side
-        if exit_y == self.__height - 1:  # Bottom row
-            self.__cells[exit_y][exit_x].has_south_wall = False
-            self.__cells[exit_y][exit_x].draw()
-            self.__draw_cell(exit_x, exit_y)
-        elif exit_x == self.__width - 1:  # East side
-            self.__cells[exit_y][exit_x].has_east_wall = False
-            self.__cells[exit_y][exit_x].draw()
-            self.__draw_cell(exit_x, exit_y)
-        else:
-            raise ValueError("Exit must be on the bottom row or east side.")
+    def __break_exit(self):
+        x, y = self.exit_coords
+        wall = exit_wall(self.__width, self.__height, self.exit_coords)
+        self.__grid.walls[self.__grid.index(x, y)] &= ~wall
+        if self.__carve_steps is not None:
+            self.__carve_steps.append((x, y, wall))
 
-    def __break_walls_r(self, i, j):
-        self.__cells[j][i].visited = True
-        while True:
-            if j < 0 or j >= self.__height or i < 0 or i >= self.__width:
-                return
+    def __break_walls(self, i, j):
+        # Iterative depth-first backtracker. The explicit stack replaces the
+        # old recursion so carving never hits the interpreter recursion limit,
+        # and neighbours are offered to choice() in the same order
+        # (north, south, west, east) so seeded mazes carve exactly as before.
+        width = self.__width
+        height = self.__height
+        walls = self.__grid.walls
+        visited = self.__grid.visited
+        carve_steps = self.__carve_steps
+        last_row = (height - 1) * width
+        choice = self.__rng.choice
+        start_time = time.perf_counter()
+        index = j * width + i
+        stack = array("I", [index])
+        visited[index >> 3] |= 1 << (index & 7)
+        carved = 1
+        max_depth = 1
+        while stack:
+            index = stack[-1]
+            i = index % width
             to_visit = []
-            if j > 0 and not self.__cells[j - 1][i].visited:
-                to_visit.append((i, j - 1))
-            if j < self.__height - 1 and not self.__cells[j + 1][i].visited:
-                to_visit.append((i, j + 1))
-            if i > 0 and not self.__cells[j][i - 1].visited:
-                to_visit.append((i - 1, j))
-            if i < self.__width - 1 and not self.__cells[j][i + 1].visited:
-                to_visit.append((i + 1, j))
+            if index >= width and not visited[(index - width) >> 3] & (1 << ((index - width) & 7)):
+                to_visit.append(index - width)
+            if index < last_row and not visited[(index + width) >> 3] & (1 << ((index + width) & 7)):
+                to_visit.append(index + width)
+            if i > 0 and not visited[(index - 1) >> 3] & (1 << ((index - 1) & 7)):
+                to_visit.append(index - 1)
+            if i < width - 1 and not visited[(index + 1) >> 3] & (1 << ((index + 1) & 7)):
+                to_visit.append(index + 1)
             if not to_visit:
-                return
-            next_cell = random.choice(to_visit)
-            if next_cell[0] == i and next_cell[1] == j - 1:
-                self.__cells[j][i].has_north_wall = False
-                self.__cells[next_cell[1]][next_cell[0]].has_south_wall = False
-            elif next_cell[0] == i and next_cell[1] == j + 1:
-                self.__cells[j][i].has_south_wall = False
-                self.__cells[next_cell[1]][next_cell[0]].has_north_wall = False
-            elif next_cell[0] == i - 1 and next_cell[1] == j:
-                self.__cells[j][i].has_west_wall = False
-                self.__cells[next_cell[1]][next_cell[0]].has_east_wall = False
-            elif next_cell[0] == i + 1 and next_cell[1] == j:
-                self.__cells[j][i].has_east_wall = False
-                self.__cells[next_cell[1]][next_cell[0]].has_west_wall = False
-            self.__draw_cell(i, j)
-            self.__draw_cell(next_cell[0], next_cell[1])
-            self.__break_walls_r(next_cell[0], next_cell[1])
+                stack.pop()
+                continue
+            next_index = choice(to_visit)
+            if next_index == index - width:
+                wall = NORTH
+                walls[next_index] &= ~SOUTH
+            elif next_index == index + width:
+                wall = SOUTH
+                walls[next_index] &= ~NORTH
+            elif next_index == index - 1:
+                wall = WEST
+                walls[next_index] &= ~EAST
+            else:
+                wall = EAST
+                walls[next_index] &= ~WEST
+            walls[index] &= ~wall
+            visited[next_index >> 3] |= 1 << (next_index & 7)
+            if carve_steps is not None:
+                # Only the shared wall changed, so erase just that line
+                carve_steps.append((i, index // width, wall))
+            stack.append(next_index)
+            carved += 1
+            if len(stack) > max_depth:
+                max_depth = len(stack)
+        self.cells_carved = carved
+        self.carve_time = time.perf_counter() - start_time
+        self.max_stack_depth = max_depth
+
+    def __generate(self, generate, start):
+        # One of the registered generators in place of the backtracker
+        start_time = time.perf_counter()
+        self.cells_carved = generate(self.__grid, self.__rng, start, self.__carve_steps)
+        self.carve_time = time.perf_counter() - start_time
+        self.max_stack_depth = 0
+
+    @property
+    def carve_rate(self):
+        """Carve throughput of the last generation in cells per second."""
+        if not self.cells_carved:
+            return 0.0
+        if self.carve_time <= 0:
+            return float("inf")
+        return self.cells_carved / self.carve_time
 
     def __reset_visited(self):
-        for row in self.__cells:
-            for cell in row:
-                cell.visited = False
+        self.__grid.reset_visited()
 
-    def solve(self):
-        self.__reset_visited()
-        try:
-            # Draw Starting line from entrance edge to center
-            entrance_cell = self.__cells[self.entrance[1]][self.entrance[0]]
-            x = self.entrance[0]
-            y = self.entrance[1]
-            buffer = self.__buffer
-            cellwidth = entrance_cell.cellwidth
-            cellheight = entrance_cell.cellheight
-            # Calculate cell center
-            center_x = x * cellwidth + cellwidth // 2 + buffer
-            center_y = y * cellheight + cellheight // 2 + buffer
-            cell_center = Point(center_x, center_y)
-            # Determine which edge to start from
-            if y == 0 and entrance_cell.has_north_wall == False:
-                # Entrance is on the top row (north wall is open)
-                start_point = Point(center_x, y * cellheight + buffer // 2)
-            elif x == 0 and entrance_cell.has_west_wall == False:
-                # Entrance is on the west side (west wall is open)
-                start_point = Point(x * cellwidth + buffer // 2, center_y)
+    def solve(self, algorithm="dfs", render=True):
+        """Solve from the entrance to the exit and return a SolveResult.
+
+        The search itself never touches Tk. When render is true and the maze
+        has a window, the solver's events are recorded and then played back
+        through the animation scheduler. Any solve hooks are entered around
+        the whole call.
+        """
+        solver = get_solver(algorithm)
+        with ExitStack() as hooks:
+            for hook in self.__solve_hooks:
+                hooks.enter_context(hook(self, algorithm))
+            result = self.__solve(solver, algorithm, render)
+        if self.stats is not None:
+            self.stats.record_solve(result)
+        return result
+
+    def tree_index(self):
+        """The TreeIndex for this maze, built on first use and after any wall change."""
+        with self.__cache_lock:
+            index = self.__tree_index
+            if index is None or index.version != self.__grid.version:
+                index = TreeIndex(self.__grid, self.entrance)
+                index.version = self.__grid.version
+                self.__tree_index = index
+            return index
+
+    def path(self, a, b):
+        """The cells from a to b inclusive, using the tree index."""
+        return self.tree_index().path(a, b)
+
+    def distance(self, a, b):
+        """Steps between cells a and b, using the tree index."""
+        return self.tree_index().distance(a, b)
+
+    def freeze(self):
+        """Make the walls read-only so solves can run concurrently on many threads.
+
+        Every solver keeps its search state per call, so frozen mazes can
+        be solved from a thread pool; changing a wall raises ValueError.
+        """
+        self.__grid.freeze()
+
+    def junction_graph(self):
+        """The corridor-compressed JunctionGraph, rebuilt after any wall change.
+
+        solve(algorithm="junction") searches this graph instead of the cells.
+        """
+        return corridors.junction_graph(self.__grid)
+
+    def distance_field(self, source=None):
+        """A DistanceField from source (default: the entrance) to every cell.
+
+        Fields are cached per source, the last few kept, and dropped as soon
+        as any wall changes.
+        """
+        source = tuple(self.entrance if source is None else source)
+        with self.__cache_lock:
+            fields = self.__distance_fields
+            # Every cached field was built from the same walls
+            if fields and next(iter(fields.values())).version != self.__grid.version:
+                fields.clear()
+            field = fields.get(source)
+            if field is None:
+                field = DistanceField(self.__grid, source)
+                fields[source] = field
+                while len(fields) > DISTANCE_FIELD_CACHE_SIZE:
+                    fields.popitem(last=False)
             else:
-                # Fallback: just use the cell center
-                start_point = cell_center
-
-            line = Line(start_point, cell_center)
-            self.__window.drawLine(line, "red")
-            self.__animate(0.05)
-
-            result = self.__solve_r(self.entrance[0], self.entrance[1])
-            
-            # Draw the exit line if the exit is reached
-            if result:
-                exit_cell = self.exit
-                exit_x = exit_cell.get_location()[0]
-                exit_y = exit_cell.get_location()[1]
-                exit_center_x = exit_x * cellwidth + cellwidth // 2 + buffer
-                exit_center_y = exit_y * cellheight + cellheight // 2 + buffer
-                exit_center = Point(exit_center_x, exit_center_y)
-                
-
-                # Determine which edge to end at
-                if exit_y == self.__height - 1 and exit_cell.has_south_wall == False:
-                    # Exit is on the bottom row (south wall is open)
-                    end_point = Point(exit_center_x, (exit_y + 1) * cellheight + 1.5 * buffer)
-                elif exit_x == self.__width - 1 and exit_cell.has_east_wall == False:
-                    # Exit is on the east side (east wall is open)
-                    end_point = Point((exit_x + 1) * cellwidth + 1.5 * buffer, exit_center_y)
-                else:
-                    # Fallback: just use the cell center
-                    end_point = exit_center
-                
-                line = Line(exit_center, end_point)
-                self.__window.drawLine(line, "red")
-                self.__animate(0.05)
-            
-            return result
+                fields.move_to_end(source)
+            return field
+
+    def solve_many(self, targets, source=None):
+        """Solve from source (default: the entrance) to every target at once.
+
+        Every target is answered from one distance field, so the batch
+        costs a single search however many targets there are. Returns one
+        SolveResult per target, in order.
+        """
+        field = self.distance_field(source)
+        return [field.solve(tuple(target)) for target in targets]
+
+    def add_solve_hook(self, hook):
+        """Register hook(maze, algorithm), a context manager factory run around solve()."""
+        self.__solve_hooks.append(hook)
+
+    def remove_solve_hook(self, hook):
+        self.__solve_hooks.remove(hook)
+
+    def __solve(self, solver, algorithm, render):
+        if not render or self.__window is None:
+            return solver(self.__grid, self.entrance, self.exit_coords)
+        events = [("entrance",)]
+        result = solver(self.__grid, self.entrance, self.exit_coords,
+                        lambda *event: events.append(event))
+        # Draw the exit line if the exit is reached
+        if result:
+            events.append(("exit",))
+        try:
+            self.__play(events, self.__draw_solve_step)
         except InterruptedError:
-            return False
-
-    def __solve_r(self, i, j, animateTime=0.03, backtrackTime=0.1):
-        self.__animate(animateTime)
-        self.__cells[j][i].visited = True
-        if self.__cells[j][i] == self.exit:
-            return True
-        # Check North
-        if j > 0 and not self.__cells[j - 1][i].visited and not self.__cells[j][i].has_north_wall:
-            self.__cells[j][i].draw_to_cell(self.__cells[j - 1][i])
-            if self.__solve_r(i, j - 1):
-                return True
-            else:
-                self.__cells[j][i].draw_to_cell(self.__cells[j - 1][i], backtrack=True)
-                self.__animate(backtrackTime)
-        # Check South
-        if j < self.__height - 1 and not self.__cells[j + 1][i].visited and not self.__cells[j][i].has_south_wall:
-            self.__cells[j][i].draw_to_cell(self.__cells[j + 1][i])
-            if self.__solve_r(i, j + 1):
-                return True
-            else:
-                self.__cells[j][i].draw_to_cell(self.__cells[j + 1][i], backtrack=True)
-                self.__animate(backtrackTime)
-        # Check West
-        if i > 0 and not self.__cells[j][i - 1].visited and not self.__cells[j][i].has_west_wall:
-            self.__cells[j][i].draw_to_cell(self.__cells[j][i - 1])
-            if self.__solve_r(i - 1, j):
-                return True
-            else:
-                self.__cells[j][i].draw_to_cell(self.__cells[j][i - 1], backtrack=True)
-                self.__animate(backtrackTime)
-        # Check East
-        if i < self.__width - 1 and not self.__cells[j][i + 1].visited and not self.__cells[j][i].has_east_wall:
-            self.__cells[j][i].draw_to_cell(self.__cells[j][i + 1])
-            if self.__solve_r(i + 1, j):
-                return True
-            else:
-                self.__cells[j][i].draw_to_cell(self.__cells[j][i + 1], backtrack=True)
-                self.__animate(backtrackTime)
-        
-        # If no path found, return False
-        return False
+            return SolveResult(algorithm, [], result.nodes_expanded, result.elapsed, result.backtracks)
+        return result
+
+    def __draw_solve_step(self, step):
+        kind = step[0]
+        if kind == "entrance":
+            self.__draw_entrance_line()
+        elif kind == "exit":
+            self.__draw_exit_line()
+        elif self.__layers is not None:
+            backtrack = kind != ADVANCE
+            self.__layers.add_line(BACKTRACK if backtrack else SOLUTION,
+                                   Line(self.__cell_center(*step[1]), self.__cell_center(*step[2])),
+                                   "gray" if backtrack else "red")
+        else:
+            self.get_cell(*step[1]).draw_to_cell(self.get_cell(*step[2]),
+                                                 backtrack=kind != ADVANCE, redraw=False)
+
+    def __cell_center(self, x, y):
+        return Point(x * self.__cellwidth + self.__cellwidth // 2 + self.__buffer,
+                     y * self.__cellheight + self.__cellheight // 2 + self.__buffer)
+
+    def __draw_entrance_line(self):
+        # Draw Starting line from entrance edge to center
+        x, y = self.entrance
+        entrance_walls = self.__grid.get_walls(x, y)
+        cell_center = self.__cell_center(x, y)
+        # Determine which edge to start from
+        if y == 0 and not entrance_walls & Walls.NORTH:
+            # Entrance is on the top row (north wall is open)
+            start_point = Point(cell_center.x, y * self.__cellheight + self.__buffer // 2)
+        elif x == 0 and not entrance_walls & Walls.WEST:
+            # Entrance is on the west side (west wall is open)
+            start_point = Point(x * self.__cellwidth + self.__buffer // 2, cell_center.y)
+        else:
+            # Fallback: just use the cell center
+            start_point = cell_center
+        self.__draw_solution_line(Line(start_point, cell_center))
+
+    def __draw_exit_line(self):
+        exit_x, exit_y = self.exit_coords
+        exit_walls = self.__grid.get_walls(exit_x, exit_y)
+        exit_center = self.__cell_center(exit_x, exit_y)
+        buffer = self.__buffer
+        # Determine which edge to end at
+        if exit_y == self.__height - 1 and not exit_walls & Walls.SOUTH:
+            # Exit is on the bottom row (south wall is open)
+            end_point = Point(exit_center.x, (exit_y + 1) * self.__cellheight + 1.5 * buffer)
+        elif exit_x == self.__width - 1 and not exit_walls & Walls.EAST:
+            # Exit is on the east side (east wall is open)
+            end_point = Point((exit_x + 1) * self.__cellwidth + 1.5 * buffer, exit_center.y)
+        else:
+            # Fallback: just use the cell center
+            end_point = exit_center
+        self.__draw_solution_line(Line(exit_center, end_point))
+
+    def __draw_solution_line(self, line):
+        if self.__layers is not None:
+            self.__layers.add_line(SOLUTION, line, "red")
+        else:
+            self.__window.drawLine(line, "red", redraw=False)
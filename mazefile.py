@@ -0,0 +1,290 @@
+import mmap
+import struct
+import sys
+from array import array
+
+# Packed maze file layout (all integers little-endian):
+#
+#   header   magic b"MAZE", version, flags, 2 pad bytes, width, height (u32),
+#            seed (i64), entrance x, y, exit x, y (u32)
+#   walls    one Walls nibble per cell, row-major, two cells per byte with
+#            the even-indexed cell in the low nibble
+#   solution optional: b"PATH", cell count (u64), then that many flat
+#            cell indices (u32) from entrance to exit
+MAGIC = b"MAZE"
+VERSION = 1
+HEADER = struct.Struct("<4sBBxxIIqIIII")
+
+SOLUTION = struct.Struct("<4sQ")
+SOLUTION_MAGIC = b"PATH"
+
+FLAG_SEED = 0x01
+FLAG_SOLUTION = 0x02
+FLAGS_OFFSET = 5
+
+# Lookup tables for bytes.translate, so packing never loops in Python
+_HIGH_NIBBLE = bytes((value << 4) & 0xFF for value in range(256))
+_LOW_ONLY = bytes(value & 0x0F for value in range(256))
+_HIGH_ONLY = bytes(value >> 4 for value in range(256))
+
+
+def packed_size(width, height):
+    return (width * height + 1) // 2
+
+
+def pack_nibbles(cells):
+    """Pack an even-length run of 4-bit cell values two per byte."""
+    low = bytes(cells[0::2])
+    high = bytes(cells[1::2]).translate(_HIGH_NIBBLE)
+    value = int.from_bytes(low, "little") | int.from_bytes(high, "little")
+    return value.to_bytes(len(low), "little")
+
+
+def unpack_nibbles(data):
+    """Unpack bytes into two 4-bit cell values each, low nibble first."""
+    cells = bytearray(len(data) * 2)
+    cells[0::2] = data.translate(_LOW_ONLY)
+    cells[1::2] = data.translate(_HIGH_ONLY)
+    return cells
+
+
+class MazeHeader:
+    def __init__(self, width, height, seed=None, entrance=(0, 0), exit=None, flags=0):
+        self.width = width
+        self.height = height
+        self.seed = seed
+        self.entrance = entrance
+        self.exit = exit if exit is not None else (width - 1, height - 1)
+        self.flags = flags
+
+    @classmethod
+    def unpack(cls, data):
+        if len(data) < HEADER.size:
+            raise ValueError("File is too short to be a maze file.")
+        magic, version, flags, width, height, seed, ex, ey, xx, xy = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("Not a maze file.")
+        if version != VERSION:
+            raise ValueError(f"Unsupported maze file version {version}.")
+        return cls(width, height, seed if flags & FLAG_SEED else None, (ex, ey), (xx, xy), flags)
+
+    def __repr__(self):
+        return (f"MazeHeader({self.width}x{self.height}, seed={self.seed}, "
+                f"entrance={self.entrance}, exit={self.exit})")
+
+
+def _encode_seed(seed):
+    # Only integer seeds that fit the header can be recorded
+    if isinstance(seed, int) and -(1 << 63) <= seed < (1 << 63):
+        return FLAG_SEED, seed
+    return 0, 0
+
+
+class MazeWriter:
+    """Stream rows of Walls bitmasks into a packed maze file.
+
+    Rows are packed and written as they arrive, so only one row is ever
+    held in memory::
+
+        with MazeWriter(path, width, height, seed, entrance, exit) as writer:
+            for row in rows:
+                writer.write_row(row)
+    """
+
+    def __init__(self, path, width, height, seed=None, entrance=(0, 0), exit=None):
+        if exit is None:
+            exit = (width - 1, height - 1)
+        flags, seed_value = _encode_seed(seed)
+        self.width = width
+        self.height = height
+        self.rows_written = 0
+        self.__flags = flags
+        self.__carry = b""
+        self.__file = open(path, "wb")
+        self.__file.write(HEADER.pack(MAGIC, VERSION, flags, width, height, seed_value,
+                                      entrance[0], entrance[1], exit[0], exit[1]))
+
+    def write_row(self, row):
+        if len(row) != self.width:
+            raise ValueError("Row length must match the maze width.")
+        if self.rows_written >= self.height:
+            raise ValueError("All rows have already been written.")
+        cells = self.__carry + bytes(row)
+        if len(cells) % 2:
+            # Odd widths leave half a byte over for the next row
+            self.__carry = cells[-1:]
+            cells = cells[:-1]
+        else:
+            self.__carry = b""
+        self.__file.write(pack_nibbles(cells))
+        self.rows_written += 1
+
+    def write_solution(self, indices):
+        """Append a solution path, given as flat cell indices, after the walls."""
+        if self.rows_written != self.height:
+            raise ValueError("Write every row before the solution.")
+        if self.__flags & FLAG_SOLUTION:
+            raise ValueError("A solution has already been written.")
+        self.__flush_carry()
+        path = array("I", indices)
+        if sys.byteorder == "big":
+            path.byteswap()
+        self.__file.write(SOLUTION.pack(SOLUTION_MAGIC, len(path)))
+        self.__file.write(path.tobytes())
+        self.__flags |= FLAG_SOLUTION
+        self.__file.seek(FLAGS_OFFSET)
+        self.__file.write(bytes([self.__flags]))
+        self.__file.seek(0, 2)
+
+    def __flush_carry(self):
+        if self.__carry:
+            self.__file.write(pack_nibbles(self.__carry + b"\0"))
+            self.__carry = b""
+
+    def close(self):
+        if self.__file.closed:
+            return
+        try:
+            self.__flush_carry()
+        finally:
+            self.__file.close()
+        if self.rows_written != self.height:
+            raise ValueError(f"Expected {self.height} rows, got {self.rows_written}.")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.__file.close()
+
+
+def write_rows(path, width, height, rows, seed=None, entrance=(0, 0), exit=None):
+    """Write an iterable of rows to path and return the number of rows written."""
+    with MazeWriter(path, width, height, seed, entrance, exit) as writer:
+        for row in rows:
+            writer.write_row(row)
+    return writer.rows_written
+
+
+def save(path, width, height, walls, seed=None, entrance=(0, 0), exit=None, solution=None):
+    """Write a whole grid of walls, plus optional solution indices, to path."""
+    with MazeWriter(path, width, height, seed, entrance, exit) as writer:
+        for y in range(height):
+            writer.write_row(walls[y * width:(y + 1) * width])
+        if solution is not None:
+            writer.write_solution(solution)
+
+
+def iter_rows(path):
+    """Yield the rows of a packed maze file one at a time as bytes."""
+    with open(path, "rb") as f:
+        header = MazeHeader.unpack(f.read(HEADER.size))
+        width = header.width
+        chunk = max(1, (width + 1) // 2)
+        pending = bytearray()
+        for _ in range(header.height):
+            while len(pending) < width:
+                data = f.read(chunk)
+                if not data:
+                    raise ValueError("Maze file is truncated.")
+                pending += unpack_nibbles(data)
+            yield bytes(pending[:width])
+            del pending[:width]
+
+
+def read_header(path):
+    with open(path, "rb") as f:
+        return MazeHeader.unpack(f.read(HEADER.size))
+
+
+class PackedWalls:
+    """Walls read straight out of packed nibbles, one cell per access.
+
+    Behaves like the bytearray a Grid normally holds: indexing returns the
+    cell's Walls bitmask and assignment writes it back, but nothing is
+    unpacked until it is asked for.
+    """
+
+    def __init__(self, buffer, offset, count):
+        self.__buffer = buffer
+        self.__offset = offset
+        self.__count = count
+
+    def __len__(self):
+        return self.__count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.__count)
+            if step != 1:
+                return bytes(self[i] for i in range(start, stop, step))
+            if start >= stop:
+                return b""
+            first = self.__offset + (start >> 1)
+            last = self.__offset + ((stop + 1) >> 1)
+            cells = unpack_nibbles(bytes(self.__buffer[first:last]))
+            skip = start & 1
+            return bytes(cells[skip:skip + stop - start])
+        if index < 0:
+            index += self.__count
+        if not 0 <= index < self.__count:
+            raise IndexError("Cell index out of range")
+        byte = self.__buffer[self.__offset + (index >> 1)]
+        return byte >> 4 if index & 1 else byte & 0x0F
+
+    def __setitem__(self, index, value):
+        if index < 0:
+            index += self.__count
+        if not 0 <= index < self.__count:
+            raise IndexError("Cell index out of range")
+        position = self.__offset + (index >> 1)
+        byte = self.__buffer[position]
+        if index & 1:
+            self.__buffer[position] = (byte & 0x0F) | ((value & 0x0F) << 4)
+        else:
+            self.__buffer[position] = (byte & 0xF0) | (value & 0x0F)
+
+    def __iter__(self):
+        chunk = 1 << 16
+        for start in range(0, self.__count, chunk):
+            yield from self[start:start + chunk]
+
+
+def load(path, lazy=True):
+    """Open a packed maze file and return (header, walls, solution).
+
+    The file is memory-mapped copy-on-write. With lazy true, walls is a
+    PackedWalls view that decodes cells on access, so even huge mazes open
+    instantly; otherwise it is a fully unpacked bytearray. solution is a
+    list of flat cell indices, or None when the file has none.
+    """
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    header = MazeHeader.unpack(buffer)
+    count = header.width * header.height
+    size = packed_size(header.width, header.height)
+    if len(buffer) < HEADER.size + size:
+        raise ValueError("Maze file is truncated.")
+    if lazy:
+        walls = PackedWalls(buffer, HEADER.size, count)
+    else:
+        walls = unpack_nibbles(buffer[HEADER.size:HEADER.size + size])
+        del walls[count:]
+    solution = None
+    if header.flags & FLAG_SOLUTION:
+        offset = HEADER.size + size
+        magic, length = SOLUTION.unpack_from(buffer, offset)
+        if magic != SOLUTION_MAGIC:
+            raise ValueError("Maze file has a corrupt solution section.")
+        offset += SOLUTION.size
+        path = array("I")
+        path.frombytes(buffer[offset:offset + 4 * length])
+        if sys.byteorder == "big":
+            path.byteswap()
+        solution = path.tolist()
+    if not lazy:
+        buffer.close()
+    return header, walls, solution
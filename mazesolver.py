@@ -1,8 +1,10 @@
 from Graphics import Window, Point, Line
 from maze import Walls, Cell, Maze
+from animation import AnimationScheduler
+from layers import CanvasLayers
+from pipeline import MazePipeline
 import sys
 import signal
-import time
 
 # Flag to control the main loop
 running = True
@@ -20,15 +22,33 @@ screen_y = 768
 buffer = 50
 num_cols = 30
 num_rows = 20
+# Pass --stats to print a timing and counter summary after every maze
+show_stats = "--stats" in sys.argv[1:]
 
 cell_size_x = (screen_x - (2 * buffer)) / num_cols
 cell_size_y = (screen_y - (2 * buffer)) / num_rows
 
 win = Window(screen_x, screen_y)
 
+# Carving and solving are drawn at 60 fps, never taking more than a few
+# seconds however many cells the maze has
+animation = AnimationScheduler(fps=60, steps_per_frame=1, max_duration=5.0)
+# Every maze reuses the same canvas items; clearing only hides the solution
+layers = CanvasLayers(win)
+
 def check_running():
     return running and win.is_open()
 
+def make_maze(n):
+    # Runs on the producer thread: carve headless and keep the carving
+    # steps, so showing the maze still animates it
+    return Maze(None, num_cols, num_rows, cell_size_x, cell_size_y, buffer, entrance="random", exit="random",
+                instrument=show_stats, record_carving=True)
+
+# The next couple of mazes are carved in the background while this one is
+# solved; the producer only reads the running flag, never the window.
+mazes = MazePipeline(make_maze, depth=2, keep_running=lambda: running)
+
 try:
     while running and win.is_open():
         try:
@@ -39,10 +59,14 @@ try:
             running = False
             break
             
-        maze = Maze(win, num_cols, num_rows, cell_size_x, cell_size_y, buffer, entrance="random", exit="random", check_interrupt=check_running)
         try:
+            maze = mazes.get(poll=win.redraw, check_interrupt=check_running)
+            maze.show(win, check_interrupt=check_running, animation=animation, layers=layers)
             maze.solve()
-            time.sleep(1.0)
+            if show_stats:
+                print(maze.stats.summary())
+                print(mazes.summary())
+            animation.pause(win, 1.0, check_running)
         except InterruptedError:
             print("Maze solving interrupted")
             break
@@ -57,6 +81,7 @@ except Exception as e:
     if "invalid command name" not in str(e):  # Ignore Tkinter errors
         print(f"An error occurred: {e}")
 finally:
+    mazes.stop(timeout=1.0)
     try:
         if win.is_open():
             win.close()
@@ -0,0 +1,123 @@
+import queue
+import threading
+import time
+
+
+class MazePipeline:
+    """Builds mazes on a background thread ahead of the display.
+
+    make_maze(n) is called on the producer thread for n = 0, 1, 2, ... and
+    must not touch Tk; build with window=None (and record_carving=True to
+    keep the carving animation), then show() the maze on the Tk thread.
+    At most depth finished mazes wait in the queue; once it is full the
+    producer blocks until the display takes one.
+
+    keep_running is polled from the producer thread, so it must be safe to
+    call from there; a plain flag check is. wait_time is how long the
+    display has spent waiting for the producer, over waits occasions.
+    """
+
+    # How often blocked threads wake up to check for shutdown, in seconds
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, make_maze, depth=2, keep_running=None):
+        if depth < 1:
+            raise ValueError("depth must be at least 1.")
+        self.depth = depth
+        self.produced = 0
+        self.consumed = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.error = None
+        self.__make_maze = make_maze
+        self.__keep_running = keep_running
+        self.__queue = queue.Queue(depth)
+        self.__stop = threading.Event()
+        self.__thread = threading.Thread(target=self.__produce, name="maze-producer", daemon=True)
+        self.__thread.start()
+
+    def __running(self):
+        return not self.__stop.is_set() and (self.__keep_running is None or self.__keep_running())
+
+    def __produce(self):
+        try:
+            while self.__running():
+                maze = self.__make_maze(self.produced)
+                while self.__running():
+                    try:
+                        self.__queue.put(maze, timeout=self.POLL_INTERVAL)
+                        break
+                    except queue.Full:
+                        continue  # Back-pressure: the display is behind
+                else:
+                    return
+                self.produced += 1
+        except BaseException as e:
+            self.error = e
+        finally:
+            self.__stop.set()
+
+    def get(self, poll=None, check_interrupt=None):
+        """The next maze, waiting for the producer if it hasn't finished one.
+
+        poll is called while waiting, e.g. to keep the window responsive.
+        InterruptedError is raised if check_interrupt returns false or the
+        pipeline has stopped; a producer exception is re-raised.
+        """
+        try:
+            maze = self.__queue.get_nowait()
+        except queue.Empty:
+            maze = self.__wait(poll, check_interrupt)
+        self.consumed += 1
+        return maze
+
+    def __wait(self, poll, check_interrupt):
+        self.waits += 1
+        start = time.perf_counter()
+        try:
+            while True:
+                if check_interrupt and not check_interrupt():
+                    raise InterruptedError("Pipeline interrupted")
+                try:
+                    return self.__queue.get(timeout=self.POLL_INTERVAL)
+                except queue.Empty:
+                    pass
+                if self.__stop.is_set() and self.__queue.empty():
+                    if self.error is not None:
+                        raise self.error
+                    raise InterruptedError("Pipeline stopped")
+                if poll:
+                    poll()
+        finally:
+            self.wait_time += time.perf_counter() - start
+
+    @property
+    def average_wait(self):
+        """Mean wait per maze taken, in seconds."""
+        return self.wait_time / self.consumed if self.consumed else 0.0
+
+    def summary(self):
+        return (f"pipeline: {self.produced} built, {self.consumed} shown, "
+                f"display waited {self.waits} times for {self.wait_time:.3f}s")
+
+    def stop(self, timeout=None):
+        """Stop the producer and wait for its thread to finish."""
+        self.__stop.set()
+        # Unblock a producer stuck on a full queue, then drop anything it
+        # managed to add on its way out
+        self.__drain()
+        self.__thread.join(timeout)
+        self.__drain()
+
+    def __drain(self):
+        while True:
+            try:
+                self.__queue.get_nowait()
+            except queue.Empty:
+                break
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,210 @@
+"""Draw mazes straight to image files, without Tk or a display.
+
+The picture matches what Maze draws on a canvas, using the same cellwidth,
+cellheight and buffer geometry: 2-pixel black walls on white, and the
+solution as a 2-pixel red line through the cell centres. Images are
+produced one pixel row at a time, so writing a PPM or PNG, or cutting out
+a tile, never holds more than a row of the picture in memory.
+
+    MazeRaster(maze.grid, path=result.path).save("maze.png")
+"""
+import struct
+import zlib
+from bisect import bisect_right
+from grid import WEST, EAST, NORTH, SOUTH
+
+BACKGROUND = b"\xff\xff\xff"
+WALL = b"\x00\x00\x00"
+SOLUTION = b"\xff\x00\x00"
+LINE_WIDTH = 2
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# Compressed PNG data is written out in chunks of about this size
+PNG_CHUNK = 1 << 16
+
+
+class MazeRaster:
+    """A grid (and optionally a solution path) as rows of RGB pixels.
+
+    path is a list of (x, y) cells. Its ends get the same stubs out through
+    the entrance and exit openings that Maze.solve draws. Cell sizes may be
+    fractional; like Tk, every position is rounded to a whole pixel.
+    """
+
+    def __init__(self, grid, cellwidth=20, cellheight=20, buffer=50, path=None):
+        self.grid = grid
+        self.cellwidth = cellwidth
+        self.cellheight = cellheight
+        self.buffer = buffer
+        # Pixel positions of the cell edges, left to right and top to bottom
+        self.__xs = [round(x * cellwidth + buffer) for x in range(grid.width + 1)]
+        self.__ys = [round(y * cellheight + buffer) for y in range(grid.height + 1)]
+        # Room for the east and south walls, which sit one pixel further out
+        self.width = self.__xs[-1] + round(buffer) + 2
+        self.height = self.__ys[-1] + round(buffer) + 1
+        self.__overlay = {}
+        if path:
+            self.__add_path(path)
+
+    def __add_rect(self, x0, y0, x1, y1):
+        # Overlay rectangles (inclusive pixel bounds) are bucketed by the cell
+        # rows they cross, so each pixel row only looks at its neighbours.
+        x0, x1 = max(0, min(x0, x1)), min(self.width - 1, max(x0, x1))
+        y0, y1 = max(0, min(y0, y1)), min(self.height - 1, max(y0, y1))
+        if x0 > x1 or y0 > y1:
+            return
+        for row in range(self.__cell_row(y0), self.__cell_row(y1) + 1):
+            self.__overlay.setdefault(row, []).append((x0, y0, x1, y1))
+
+    def __cell_row(self, py):
+        # -1 above the maze, grid.height below it
+        return bisect_right(self.__ys, py) - 1
+
+    def __centre(self, x, y):
+        xs, ys = self.__xs, self.__ys
+        return (xs[x] + (xs[x + 1] - xs[x]) // 2, ys[y] + (ys[y + 1] - ys[y]) // 2)
+
+    def __add_line(self, ax, ay, bx, by):
+        # Axis-aligned line LINE_WIDTH pixels thick, like a Tk width=2 line
+        # Order the ends first so the stroke covers the same pixels either way
+        half = LINE_WIDTH // 2
+        x0, x1 = sorted((ax, bx))
+        y0, y1 = sorted((ay, by))
+        self.__add_rect(x0 - half, y0 - half, x1 - half + LINE_WIDTH - 1, y1 - half + LINE_WIDTH - 1)
+
+    def __add_path(self, path):
+        grid = self.grid
+        half_buffer = round(self.buffer) // 2
+        for (ax, ay), (bx, by) in zip(path, path[1:]):
+            self.__add_line(*self.__centre(ax, ay), *self.__centre(bx, by))
+        # Stubs through the openings, as Maze draws them
+        x, y = path[0]
+        cx, cy = self.__centre(x, y)
+        walls = grid.walls[grid.index(x, y)]
+        if y == 0 and not walls & NORTH:
+            self.__add_line(cx, half_buffer, cx, cy)
+        elif x == 0 and not walls & WEST:
+            self.__add_line(half_buffer, cy, cx, cy)
+        x, y = path[-1]
+        cx, cy = self.__centre(x, y)
+        walls = grid.walls[grid.index(x, y)]
+        if y == grid.height - 1 and not walls & SOUTH:
+            self.__add_line(cx, cy, cx, self.__ys[y + 1] + half_buffer)
+        elif x == grid.width - 1 and not walls & EAST:
+            self.__add_line(cx, cy, self.__xs[x + 1] + half_buffer, cy)
+
+    def __vertical_walls(self, y):
+        # One pixel row of cell row y: just its west and east walls
+        grid = self.grid
+        width = grid.width
+        walls = grid.walls
+        xs = self.__xs
+        start = y * width
+        row = bytearray(BACKGROUND) * self.width
+        stroke = WALL * LINE_WIDTH
+        offset = LINE_WIDTH // 2
+        for x in range(width + 1):
+            if (x < width and walls[start + x] & WEST) or (x > 0 and walls[start + x - 1] & EAST):
+                px = (xs[x] + 1 - offset) * 3
+                row[px:px + len(stroke)] = stroke
+        return bytes(row)
+
+    def __horizontal_walls(self, row, boundary):
+        # Add the walls along the top of cell row boundary to a pixel row
+        grid = self.grid
+        width = grid.width
+        walls = grid.walls
+        xs = self.__xs
+        above = (boundary - 1) * width
+        below = boundary * width
+        offset = LINE_WIDTH // 2
+        run_start = None
+        for x in range(width + 1):
+            present = x < width and ((boundary < grid.height and walls[below + x] & NORTH) or
+                                     (boundary > 0 and walls[above + x] & SOUTH))
+            if present and run_start is None:
+                run_start = x
+            elif not present and run_start is not None:
+                # Reach back over the vertical wall so corners join up
+                left = xs[run_start] + 1 - offset
+                right = xs[x] + 1 - offset + LINE_WIDTH
+                row[left * 3:right * 3] = WALL * (right - left)
+                run_start = None
+
+    def rows(self, top=0, bottom=None):
+        """Yield pixel rows top to bottom-1 as RGB bytes."""
+        bottom = self.height if bottom is None else min(bottom, self.height)
+        height = self.grid.height
+        ys = self.__ys
+        offset = LINE_WIDTH // 2
+        blank = BACKGROUND * self.width
+        pattern_row, pattern = None, blank
+        for py in range(max(0, top), bottom):
+            cell_row = self.__cell_row(py)
+            clamped = min(max(cell_row, 0), height - 1)
+            if ys[0] - offset <= py <= ys[-1] - offset + LINE_WIDTH - 1:
+                if pattern_row != clamped:
+                    pattern_row, pattern = clamped, self.__vertical_walls(clamped)
+                line = pattern
+            else:
+                line = blank
+            # The wall row whose LINE_WIDTH-pixel band py falls in, if any
+            boundary = bisect_right(ys, py + offset) - 1
+            on_wall = boundary >= 0 and py + offset - ys[boundary] < LINE_WIDTH
+            rects = self.__overlay.get(cell_row)
+            if on_wall or rects:
+                line = bytearray(line)
+                if on_wall:
+                    self.__horizontal_walls(line, boundary)
+                for x0, y0, x1, y1 in rects or ():
+                    if y0 <= py <= y1:
+                        line[x0 * 3:(x1 + 1) * 3] = SOLUTION * (x1 - x0 + 1)
+                line = bytes(line)
+            yield line
+
+    def tile(self, left, top, right, bottom):
+        """The pixels in [left, right) x [top, bottom) as packed RGB bytes."""
+        right = min(right, self.width)
+        return b"".join(row[left * 3:right * 3] for row in self.rows(top, bottom))
+
+    def write_ppm(self, f):
+        f.write(b"P6\n%d %d\n255\n" % (self.width, self.height))
+        for row in self.rows():
+            f.write(row)
+
+    def write_png(self, f, level=6):
+        f.write(PNG_SIGNATURE)
+        _png_chunk(f, b"IHDR", struct.pack(">IIBBBBB", self.width, self.height, 8, 2, 0, 0, 0))
+        compressor = zlib.compressobj(level)
+        pending = []
+        size = 0
+        for row in self.rows():
+            # Filter type 0: each row goes in as-is
+            data = compressor.compress(b"\0" + row)
+            if data:
+                pending.append(data)
+                size += len(data)
+                if size >= PNG_CHUNK:
+                    _png_chunk(f, b"IDAT", b"".join(pending))
+                    pending, size = [], 0
+        pending.append(compressor.flush())
+        _png_chunk(f, b"IDAT", b"".join(pending))
+        _png_chunk(f, b"IEND", b"")
+
+    def save(self, path):
+        """Write a .png or .ppm file, chosen by the extension."""
+        if path.lower().endswith(".ppm"):
+            write = self.write_ppm
+        elif path.lower().endswith(".png"):
+            write = self.write_png
+        else:
+            raise ValueError("Image path must end in .png or .ppm.")
+        with open(path, "wb") as f:
+            write(f)
+
+
+def _png_chunk(f, kind, data):
+    f.write(struct.pack(">I", len(data)))
+    f.write(kind)
+    f.write(data)
+    f.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(kind))))
@@ -0,0 +1,369 @@
+import time
+import heapq
+from array import array
+from collections import deque
+from grid import WEST, EAST, NORTH, SOUTH
+
+# Solver events, passed to on_event(kind, from_xy, to_xy):
+#   "advance"   - the search moved along a (tentative) path edge
+#   "backtrack" - a depth-first search abandoned an edge
+#   "explore"   - a frontier search discovered or discarded an edge
+# Solvers that don't search along a single path emit the final route as
+# "advance" events once it is known, so a renderer only has to draw events.
+ADVANCE = "advance"
+BACKTRACK = "backtrack"
+EXPLORE = "explore"
+
+
+class SolveResult:
+    """Outcome of a solve: the path as (x, y) tuples plus search statistics.
+
+    Truthy when a path was found, so ``if maze.solve():`` keeps working.
+    """
+
+    def __init__(self, algorithm, path, nodes_expanded, elapsed, backtracks=0):
+        self.algorithm = algorithm
+        self.path = path
+        self.nodes_expanded = nodes_expanded
+        self.elapsed = elapsed
+        self.backtracks = backtracks
+
+    @property
+    def found(self):
+        return bool(self.path)
+
+    def __bool__(self):
+        return self.found
+
+    def __len__(self):
+        return len(self.path)
+
+    def __repr__(self):
+        return (f"SolveResult({self.algorithm}, length={len(self.path)}, "
+                f"nodes_expanded={self.nodes_expanded}, elapsed={self.elapsed:.6f}s)")
+
+
+def open_neighbours(walls, width, last_row, index):
+    """Flat indices of the cells reachable in one step from index.
+
+    last_row is the index of the first cell on the bottom row. Neighbours
+    come in north, south, west, east order, the order the original
+    recursive solver tried them in.
+    """
+    cell_walls = walls[index]
+    result = []
+    if not cell_walls & NORTH and index >= width:
+        result.append(index - width)
+    if not cell_walls & SOUTH and index < last_row:
+        result.append(index + width)
+    if not cell_walls & WEST and index % width:
+        result.append(index - 1)
+    if not cell_walls & EAST and (index + 1) % width:
+        result.append(index + 1)
+    return result
+
+
+def _location(index, width):
+    return (index % width, index // width)
+
+
+def _trace(parent, start, goal):
+    path = [goal]
+    while path[-1] != start:
+        path.append(parent[path[-1]])
+    path.reverse()
+    return path
+
+
+def _finish(grid, algorithm, path, expanded, start_time, on_event):
+    width = grid.width
+    coords = [_location(index, width) for index in path]
+    if on_event is not None:
+        for a, b in zip(coords, coords[1:]):
+            on_event(ADVANCE, a, b)
+    return SolveResult(algorithm, coords, expanded, time.perf_counter() - start_time)
+
+
+def dfs(grid, start, goal, on_event=None):
+    """Iterative depth-first search; the search order of the old Maze.__solve_r."""
+    start_time = time.perf_counter()
+    width = grid.width
+    walls = grid.walls
+    last_row = len(walls) - width
+    source = grid.index(*start)
+    target = grid.index(*goal)
+    seen = bytearray(len(walls))
+    seen[source] = 1
+    stack = [source]
+    pending = [open_neighbours(walls, width, last_row, source)]
+    expanded = 1
+    backtracks = 0
+    while stack:
+        current = stack[-1]
+        if current == target:
+            coords = [_location(index, width) for index in stack]
+            return SolveResult("dfs", coords, expanded, time.perf_counter() - start_time, backtracks)
+        options = pending[-1]
+        while options and seen[options[0]]:
+            options.pop(0)
+        if options:
+            nxt = options.pop(0)
+            seen[nxt] = 1
+            expanded += 1
+            if on_event is not None:
+                on_event(ADVANCE, _location(current, width), _location(nxt, width))
+            stack.append(nxt)
+            pending.append(open_neighbours(walls, width, last_row, nxt))
+        else:
+            stack.pop()
+            pending.pop()
+            backtracks += 1
+            if stack and on_event is not None:
+                on_event(BACKTRACK, _location(stack[-1], width), _location(current, width))
+    return SolveResult("dfs", [], expanded, time.perf_counter() - start_time, backtracks)
+
+
+def bfs(grid, start, goal, on_event=None):
+    """Breadth-first search; finds a shortest path."""
+    start_time = time.perf_counter()
+    width = grid.width
+    walls = grid.walls
+    last_row = len(walls) - width
+    source = grid.index(*start)
+    target = grid.index(*goal)
+    parent = array("i", [-1]) * len(walls)
+    parent[source] = source
+    queue = deque([source])
+    expanded = 0
+    while queue:
+        current = queue.popleft()
+        expanded += 1
+        if current == target:
+            return _finish(grid, "bfs", _trace(parent, source, target), expanded, start_time, on_event)
+        for nxt in open_neighbours(walls, width, last_row, current):
+            if parent[nxt] < 0:
+                parent[nxt] = current
+                queue.append(nxt)
+                if on_event is not None:
+                    on_event(EXPLORE, _location(current, width), _location(nxt, width))
+    return SolveResult("bfs", [], expanded, time.perf_counter() - start_time)
+
+
+def astar(grid, start, goal, on_event=None):
+    """A* search with the Manhattan distance heuristic."""
+    start_time = time.perf_counter()
+    width = grid.width
+    walls = grid.walls
+    last_row = len(walls) - width
+    source = grid.index(*start)
+    target = grid.index(*goal)
+    goal_x, goal_y = goal
+    parent = array("i", [-1]) * len(walls)
+    cost = array("i", [-1]) * len(walls)
+    parent[source] = source
+    cost[source] = 0
+    heap = [(abs(start[0] - goal_x) + abs(start[1] - goal_y), 0, source)]
+    expanded = 0
+    while heap:
+        _, g, current = heapq.heappop(heap)
+        if g > cost[current]:
+            continue  # Stale heap entry
+        expanded += 1
+        if current == target:
+            return _finish(grid, "astar", _trace(parent, source, target), expanded, start_time, on_event)
+        g += 1
+        for nxt in open_neighbours(walls, width, last_row, current):
+            if cost[nxt] < 0 or g < cost[nxt]:
+                cost[nxt] = g
+                parent[nxt] = current
+                x, y = nxt % width, nxt // width
+                heapq.heappush(heap, (g + abs(x - goal_x) + abs(y - goal_y), g, nxt))
+                if on_event is not None:
+                    on_event(EXPLORE, _location(current, width), (x, y))
+    return SolveResult("astar", [], expanded, time.perf_counter() - start_time)
+
+
+def bidirectional_bfs(grid, start, goal, on_event=None):
+    """Breadth-first search run from both ends, meeting in the middle."""
+    start_time = time.perf_counter()
+    width = grid.width
+    walls = grid.walls
+    last_row = len(walls) - width
+    source = grid.index(*start)
+    target = grid.index(*goal)
+    if source == target:
+        return _finish(grid, "bidirectional", [source], 1, start_time, on_event)
+    forward = array("i", [-1]) * len(walls)
+    backward = array("i", [-1]) * len(walls)
+    forward[source] = source
+    backward[target] = target
+    forward_frontier = [source]
+    backward_frontier = [target]
+    expanded = 0
+    meeting = -1
+    while forward_frontier and backward_frontier and meeting < 0:
+        # Grow the smaller frontier by one whole level
+        if len(forward_frontier) <= len(backward_frontier):
+            frontier, parent, other = forward_frontier, forward, backward
+        else:
+            frontier, parent, other = backward_frontier, backward, forward
+        next_frontier = []
+        for current in frontier:
+            expanded += 1
+            for nxt in open_neighbours(walls, width, last_row, current):
+                if parent[nxt] >= 0:
+                    continue
+                parent[nxt] = current
+                if on_event is not None:
+                    on_event(EXPLORE, _location(current, width), _location(nxt, width))
+                if other[nxt] >= 0:
+                    meeting = nxt
+                    break
+                next_frontier.append(nxt)
+            if meeting >= 0:
+                break
+        if frontier is forward_frontier:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
+    if meeting < 0:
+        return SolveResult("bidirectional", [], expanded, time.perf_counter() - start_time)
+    path = _trace(forward, source, meeting)
+    index = meeting
+    while index != target:
+        index = backward[index]
+        path.append(index)
+    return _finish(grid, "bidirectional", path, expanded, start_time, on_event)
+
+
+def dead_end_filling(grid, start, goal, on_event=None):
+    """Fill in dead ends until only the route(s) between start and goal remain."""
+    start_time = time.perf_counter()
+    width = grid.width
+    walls = grid.walls
+    last_row = len(walls) - width
+    source = grid.index(*start)
+    target = grid.index(*goal)
+    count = len(walls)
+    degree = bytearray(count)
+    for index in range(count):
+        degree[index] = len(open_neighbours(walls, width, last_row, index))
+    filled = bytearray(count)
+    queue = deque(index for index in range(count)
+                  if degree[index] <= 1 and index != source and index != target)
+    expanded = 0
+    while queue:
+        current = queue.popleft()
+        filled[current] = 1
+        expanded += 1
+        for nxt in open_neighbours(walls, width, last_row, current):
+            if filled[nxt]:
+                continue
+            if on_event is not None:
+                on_event(EXPLORE, _location(current, width), _location(nxt, width))
+            degree[nxt] -= 1
+            if degree[nxt] == 1 and nxt != source and nxt != target:
+                queue.append(nxt)
+    # Whatever is left is the solution (or a few loops around it); walk it.
+    parent = array("i", [-1]) * count
+    parent[source] = source
+    queue = deque([source])
+    while queue:
+        current = queue.popleft()
+        expanded += 1
+        if current == target:
+            return _finish(grid, "dead_end_filling", _trace(parent, source, target),
+                           expanded, start_time, on_event)
+        for nxt in open_neighbours(walls, width, last_row, current):
+            if parent[nxt] < 0 and not filled[nxt]:
+                parent[nxt] = current
+                queue.append(nxt)
+    return SolveResult("dead_end_filling", [], expanded, time.perf_counter() - start_time)
+
+
+class DistanceField:
+    """BFS distances and parent pointers from one source to every cell.
+
+    Built in one full iterative pass; afterwards any number of targets can
+    be answered by following parent pointers back to the source.
+    ``distances`` and ``parents`` are flat arrays indexed like the grid,
+    with -1 for cells the source can't reach.
+    """
+
+    def __init__(self, grid, source):
+        start_time = time.perf_counter()
+        width = grid.width
+        walls = grid.walls
+        last_row = len(walls) - width
+        self.width = width
+        self.height = grid.height
+        origin = self.__index(source)
+        distances = array("i", [-1]) * len(walls)
+        parents = array("i", [-1]) * len(walls)
+        distances[origin] = 0
+        parents[origin] = origin
+        queue = deque([origin])
+        expanded = 0
+        while queue:
+            current = queue.popleft()
+            expanded += 1
+            next_distance = distances[current] + 1
+            for nxt in open_neighbours(walls, width, last_row, current):
+                if distances[nxt] < 0:
+                    distances[nxt] = next_distance
+                    parents[nxt] = current
+                    queue.append(nxt)
+        self.source = tuple(source)
+        self.distances = distances
+        self.parents = parents
+        self.nodes_expanded = expanded
+        self.build_time = time.perf_counter() - start_time
+        self.version = grid.version
+
+    def __index(self, cell):
+        x, y = cell
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise IndexError("Cell is outside the maze.")
+        return y * self.width + x
+
+    def distance_to(self, cell):
+        """Steps from the source to cell, or None if it can't be reached."""
+        distance = self.distances[self.__index(cell)]
+        return distance if distance >= 0 else None
+
+    def path_to(self, cell):
+        """Cells from the source to cell inclusive; empty if unreachable."""
+        target = self.__index(cell)
+        if self.distances[target] < 0:
+            return []
+        origin = self.source[1] * self.width + self.source[0]
+        width = self.width
+        return [(index % width, index // width) for index in _trace(self.parents, origin, target)]
+
+    def solve(self, target):
+        """A SolveResult for one target; elapsed covers only the path trace."""
+        start_time = time.perf_counter()
+        path = self.path_to(target)
+        return SolveResult("distance_field", path, self.nodes_expanded, time.perf_counter() - start_time)
+
+
+SOLVERS = {
+    "dfs": dfs,
+    "bfs": bfs,
+    "astar": astar,
+    "bidirectional": bidirectional_bfs,
+    "dead_end_filling": dead_end_filling,
+}
+
+
+def register_solver(name, solver):
+    """Make solver(grid, start, goal, on_event=None) available as name."""
+    SOLVERS[name] = solver
+
+
+def get_solver(algorithm):
+    try:
+        return SOLVERS[algorithm]
+    except KeyError:
+        raise ValueError(f"Unknown solver algorithm: {algorithm!r}. "
+                         f"Choose from {', '.join(sorted(SOLVERS))}.") from None
@@ -1,7 +1,134 @@
+import os
+import tempfile
+import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import Tk, BOTH, Canvas
 from Graphics import Window, Point, Line
-from maze import Maze
+from maze import Maze, wall_segments
+from grid import Grid, Walls, ALL
+from generators import EllerRows
+import generators
+from solvers import bfs, get_solver
+import mazefile
+from animation import AnimationScheduler
+import benchmark
+from raster import MazeRaster
+from layers import CanvasLayers
+from pipeline import MazePipeline
+from tiled import TiledMaze
+from viewport import Viewport
+from grid import NORTH, SOUTH, EAST, WEST
+from instrumentation import cprofile_hook
+from batch import BatchJob, run_batch
+
+class CountingWindow:
+    # Stands in for Graphics.Window where there is no display
+
+    def __init__(self):
+        self.reset_counters()
+        self.timers = []
+
+    def is_open(self):
+        return True
+
+    def after(self, delay_ms, callback):
+        self.timers.append(callback)
+
+    def wait_event(self):
+        # Timers fire immediately; there is no real clock here
+        self.timers.pop(0)()
+
+    def reset_counters(self):
+        self.items_created = 0
+        self.items_updated = 0
+        self.redraw_count = 0
+
+    def redraw(self):
+        self.redraw_count += 1
+
+    def drawLine(self, line, fill_color="black", redraw=True):
+        self.drawLines([line], fill_color, redraw)
+
+    def drawLines(self, lines, fill_color="black", redraw=True):
+        self.items_created += len(lines)
+        if redraw:
+            self.redraw()
+
+    def fillRect(self, x1, y1, x2, y2, fill_color="white", redraw=True):
+        self.drawLines([None], fill_color, redraw)
+
+    def createLine(self, line, fill_color="black", tags=()):
+        self.items_created += 1
+        return self.items_created
+
+    def updateItem(self, item, line=None, **options):
+        self.items_updated += 1
+
+    def setTagState(self, tag, hidden):
+        self.items_updated += 1
+
+    def raiseTag(self, tag):
+        pass
+
+    def drawImage(self, x, y, data, tags=()):
+        self.items_created += 1
+        self.image = data
+
+    def moveItems(self, tag, dx, dy):
+        pass
+
+    def deleteItems(self, tag):
+        pass
+
+    def clear(self):
+        pass
+
+
+class StackingWindow(CountingWindow):
+    # Also tracks each line item's position, colour and place in the stacking order
+
+    def __init__(self):
+        super().__init__()
+        self.lines = {}
+        self.order = []
+
+    def createLine(self, line, fill_color="black", tags=()):
+        item = super().createLine(line, fill_color, tags)
+        self.lines[item] = {"line": line, "fill": fill_color, "tags": tags, "hidden": False}
+        self.order.append(item)
+        return item
+
+    def updateItem(self, item, line=None, **options):
+        super().updateItem(item, line, **options)
+        entry = self.lines[item]
+        if line is not None:
+            entry["line"] = line
+        entry["fill"] = options.get("fill", entry["fill"])
+        if "state" in options:
+            entry["hidden"] = options["state"] == "hidden"
+
+    def setTagState(self, tag, hidden):
+        super().setTagState(tag, hidden)
+        for entry in self.lines.values():
+            if tag in entry["tags"]:
+                entry["hidden"] = hidden
+
+    def raiseTag(self, tag):
+        raised = [item for item in self.order if item == tag or tag in self.lines[item]["tags"]]
+        self.order = [item for item in self.order if item not in raised] + raised
+
+    def top_colours(self):
+        # Colour seen on top for every segment with a visible line over it
+        top = {}
+        for item in self.order:
+            entry = self.lines[item]
+            if not entry["hidden"]:
+                line = entry["line"]
+                key = frozenset(((line.start.x, line.start.y), (line.end.x, line.end.y)))
+                top[key] = entry["fill"]
+        return top
+
 
 class Tests(unittest.TestCase):
     def test_maze_create_cells(self):
@@ -47,6 +174,452 @@ class Tests(unittest.TestCase):
         # Again, we cannot visually verify the drawing, so we will just check if the method runs without error.
         self.assertTrue(True)
 
+    def test_maze_large_generation_is_stack_safe(self):
+        # 250x250 used to blow past the default recursion limit
+        m1 = Maze(None, 250, 250, seed=1)
+        self.assertEqual(m1.cells_carved, 250 * 250)
+        self.assertGreater(m1.carve_rate, 0)
+
+    def test_maze_seeded_generation_is_repeatable(self):
+        def walls(m):
+            return [(c.has_west_wall, c.has_east_wall, c.has_north_wall, c.has_south_wall)
+                    for row in m._Maze__cells for c in row]
+        self.assertEqual(walls(Maze(None, 15, 12, seed=42)), walls(Maze(None, 15, 12, seed=42)))
+
+    def test_maze_cell_views_share_grid(self):
+        m1 = Maze(None, 6, 5, seed=3)
+        cell = m1.get_cell(2, 2)
+        cell.has_east_wall = True
+        self.assertTrue(m1.get_cell(2, 2).has_east_wall)
+        self.assertEqual(m1.get_cell(2, 2), cell)
+        self.assertEqual(m1.grid.get_walls(2, 2), cell.walls)
+
+    def test_grid_is_one_byte_per_cell(self):
+        m1 = Maze(None, 400, 250, seed=1)
+        cells = 400 * 250
+        self.assertEqual(len(m1.grid.walls), cells)
+        self.assertLessEqual(m1.grid.nbytes, cells + cells // 8 + 1)
+
+    def test_grid_carve_and_visited(self):
+        grid = Grid(3, 2)
+        grid.carve(grid.index(0, 0), grid.index(1, 0))
+        self.assertEqual(grid.get_walls(0, 0), Walls.WEST | Walls.NORTH | Walls.SOUTH)
+        self.assertEqual(grid.get_walls(1, 0), Walls.EAST | Walls.NORTH | Walls.SOUTH)
+        with self.assertRaises(ValueError):
+            grid.carve(grid.index(2, 0), grid.index(0, 1))
+        grid.set_visited(4)
+        self.assertTrue(grid.is_visited(4))
+        grid.reset_visited()
+        self.assertFalse(grid.is_visited(4))
+
+    def test_maze_solve_headless_all_algorithms(self):
+        m1 = Maze(None, 30, 20, seed=5, entrance="random", exit="random")
+        paths = []
+        for algorithm in ("dfs", "bfs", "astar", "bidirectional", "dead_end_filling"):
+            result = m1.solve(algorithm=algorithm, render=False)
+            self.assertTrue(result)
+            self.assertEqual(result.path[0], m1.entrance)
+            self.assertEqual(result.path[-1], m1.exit_coords)
+            self.assertGreater(result.nodes_expanded, 0)
+            paths.append(result.path)
+        # A perfect maze has exactly one route
+        for path in paths[1:]:
+            self.assertEqual(path, paths[0])
+
+    def test_maze_solve_unknown_algorithm(self):
+        m1 = Maze(None, 4, 4)
+        with self.assertRaises(ValueError):
+            m1.solve(algorithm="teleport")
+
+    def test_eller_rows_make_a_perfect_maze(self):
+        rows = EllerRows(17, 23, seed=9, entrance="random", exit="random")
+        grid = Grid(17, 23)
+        grid.walls[:] = b"".join(rows)
+        self.assertEqual(b"".join(rows), bytes(grid.walls))  # replayable
+        openings = sum(bin(ALL & ~walls).count("1") for walls in grid.walls)
+        # Spanning tree: n - 1 passages, each seen from both sides, plus the two openings
+        self.assertEqual(openings, 2 * (17 * 23 - 1) + 2)
+        self.assertTrue(bfs(grid, rows.entrance, rows.exit_coords))
+
+    def test_eller_rows_stream_to_file(self):
+        rows = EllerRows(9, 40, seed=4)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "eller.maze")
+            self.assertEqual(rows.write(path), 40)
+            header = mazefile.read_header(path)
+            self.assertEqual((header.width, header.height, header.seed), (9, 40, 4))
+            self.assertEqual(list(mazefile.iter_rows(path)), list(rows))
+
+    def test_wall_segments_merge_runs(self):
+        grid = Grid(12, 10)
+        # A closed grid is just its row and column boundaries
+        self.assertEqual(len(wall_segments(grid)), 11 + 13)
+        m1 = Maze(None, 12, 10, seed=2)
+        segments = wall_segments(m1.grid)
+        self.assertLess(len(segments), 4 * 12 * 10)
+
+    def test_maze_draw_is_one_batch(self):
+        window = CountingWindow()
+        m1 = Maze(window, 12, 10, seed=2)
+        window.reset_counters()
+        m1.draw()
+        self.assertEqual(window.redraw_count, 1)
+        self.assertEqual(window.items_created, len(wall_segments(m1.grid, 20, 20, 50)) + 1)
+
+    def test_animation_scheduler_batches_steps_into_frames(self):
+        window = CountingWindow()
+        drawn = []
+        scheduler = AnimationScheduler(fps=30, steps_per_frame=4)
+        scheduler.play(window, list(range(10)), drawn.append)
+        self.assertEqual(drawn, list(range(10)))
+        self.assertEqual(scheduler.frames, 3)
+        self.assertEqual(window.redraw_count, 1)
+
+        scheduler = AnimationScheduler(fps=10, max_duration=2.0)
+        self.assertEqual(scheduler.budget(1000), 50)
+        scheduler = AnimationScheduler(instant=True)
+        scheduler.play(window, range(100), drawn.append)
+        self.assertEqual(scheduler.frames, 1)
+
+    def test_animation_scheduler_polls_interrupt_per_frame(self):
+        window = CountingWindow()
+        polls = []
+
+        def check_interrupt():
+            polls.append(True)
+            return len(polls) < 3
+
+        scheduler = AnimationScheduler(steps_per_frame=5)
+        with self.assertRaises(InterruptedError):
+            scheduler.play(window, range(100), lambda step: None, check_interrupt)
+        self.assertEqual(scheduler.steps, 10)
+
+    def test_maze_solve_renders_through_scheduler(self):
+        window = CountingWindow()
+        m1 = Maze(window, 12, 10, seed=2, animation=AnimationScheduler(instant=True))
+        window.reset_counters()
+        result = m1.solve(algorithm="bfs")
+        self.assertTrue(result)
+        self.assertEqual(window.redraw_count, 1)
+
+    def test_maze_save_and_load(self):
+        m1 = Maze(None, 13, 8, seed=6, entrance="random", exit="random")
+        result = m1.solve(algorithm="bfs")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "saved.maze")
+            m1.save(path, solution=result)
+            for lazy in (True, False):
+                m2 = Maze.load(path, lazy=lazy)
+                self.assertEqual(bytes(m2.grid.walls), bytes(m1.grid.walls))
+                self.assertEqual((m2.entrance, m2.exit_coords, m2.seed), (m1.entrance, m1.exit_coords, 6))
+                self.assertEqual(m2.solution, result.path)
+                self.assertEqual(m2.solve(algorithm="astar").path, result.path)
+                del m2
+
+    def test_packed_walls_decode_lazily(self):
+        data = bytearray(mazefile.pack_nibbles(bytes([1, 2, 3, 4, 5, 15])))
+        walls = mazefile.PackedWalls(data, 0, 5)
+        self.assertEqual(list(walls), [1, 2, 3, 4, 5])
+        self.assertEqual(walls[1:4], bytes([2, 3, 4]))
+        walls[3] = 9
+        self.assertEqual((walls[2], walls[3], walls[4]), (3, 9, 5))
+
+    def test_benchmark_runs_headless_and_flags_regressions(self):
+        results = benchmark.run(sizes=[(8, 6)], seeds=[1], solvers=["bfs"])
+        self.assertIn("construct/8x6", results)
+        self.assertIn("solve/bfs/8x6", results)
+        self.assertIn("carve/kruskal/8x6", results)
+        self.assertIn("carve/wilson/8x6", results)
+        self.assertEqual(results["render/bulk/8x6"]["redraws"], 1)
+        self.assertEqual(results["render/cells/8x6"]["items"], 4 * 8 * 6)
+        slower = {name: dict(values, seconds=values["seconds"] * 2 + 1)
+                  for name, values in results.items()}
+        self.assertEqual(benchmark.compare(results, results), [])
+        self.assertEqual(len(benchmark.compare(slower, results)), len(results))
+        # Sub-millisecond jitter is ignored, however large relatively
+        noisy = {"solve/bfs/8x6": dict(seconds=0.0004)}
+        quiet = {"solve/bfs/8x6": dict(seconds=0.0002)}
+        self.assertEqual(benchmark.compare(noisy, quiet), [])
+        self.assertEqual(benchmark.compare(noisy, quiet, min_delta=0), [("solve/bfs/8x6", 0.0002, 0.0004)])
+
+    def test_maze_instrumentation(self):
+        window = CountingWindow()
+        m1 = Maze(window, 12, 10, seed=2, animation=AnimationScheduler(steps_per_frame=8), instrument=True)
+        self.assertEqual(m1.stats.cells_carved, 120)
+        self.assertGreater(m1.stats.max_stack_depth, 0)
+        self.assertGreater(m1.stats.draw_lines, 0)
+        hook = cprofile_hook()
+        m1.add_solve_hook(hook)
+        result = m1.solve(algorithm="dfs")
+        self.assertEqual(m1.stats.solver, "dfs")
+        self.assertEqual(m1.stats.nodes_expanded, result.nodes_expanded)
+        self.assertEqual(m1.stats.backtracks, result.backtracks)
+        self.assertEqual(m1.stats.path_length, len(result.path))
+        self.assertGreater(m1.stats.frames, 0)
+        self.assertTrue(hook.profile.getstats())
+        self.assertIn("dfs", m1.stats.summary())
+        self.assertIsNone(Maze(None, 4, 4).stats)
+
+    def test_batch_matches_sequential_mazes(self):
+        jobs = [BatchJob(9, 7, seed, "random", "random") for seed in range(6)]
+        results = sorted(run_batch(jobs, workers=2), key=lambda result: result.job.seed)
+        self.assertEqual([result.job.seed for result in results], list(range(6)))
+        for result in results:
+            m1 = Maze(None, 9, 7, seed=result.job.seed, entrance="random", exit="random")
+            self.assertEqual(bytes(result.grid().walls), bytes(m1.grid.walls))
+            self.assertEqual(result.path, m1.solve(algorithm="bfs").path)
+
+    def test_tree_index_path_queries(self):
+        m1 = Maze(None, 25, 15, seed=8, entrance="random", exit="random")
+        for a, b in [((0, 0), (24, 14)), ((3, 7), (3, 7)), ((20, 2), (1, 13)), ((12, 0), (12, 14))]:
+            expected = bfs(m1.grid, a, b).path
+            self.assertEqual(m1.path(a, b), expected)
+            self.assertEqual(m1.distance(a, b), len(expected) - 1)
+        self.assertEqual(m1.path(m1.entrance, m1.exit_coords), m1.solve(algorithm="bfs").path)
+
+    def test_tree_index_rebuilds_after_wall_change(self):
+        m1 = Maze(None, 10, 10, seed=1)
+        index = m1.tree_index()
+        self.assertIs(m1.tree_index(), index)
+        for x in range(9):
+            if m1.get_cell(x, 4).has_east_wall:
+                m1.get_cell(x, 4).has_east_wall = False
+                m1.get_cell(x + 1, 4).has_west_wall = False
+                break
+        with self.assertRaises(ValueError):
+            m1.tree_index()
+
+    def test_distance_field_and_solve_many(self):
+        m1 = Maze(None, 20, 14, seed=4)
+        field = m1.distance_field()
+        self.assertIs(m1.distance_field(m1.entrance), field)
+        self.assertEqual(field.distance_to(m1.entrance), 0)
+        targets = [(19, 13), (0, 13), (19, 0), (7, 7)]
+        results = m1.solve_many(targets)
+        for target, result in zip(targets, results):
+            self.assertEqual(result.path, bfs(m1.grid, m1.entrance, target).path)
+            self.assertEqual(field.distance_to(target), len(result.path) - 1)
+        self.assertEqual(min(field.distances), 0)  # perfect maze: everything reachable
+        for source in [(-1, 0), (20, 0), (0, 14)]:
+            with self.assertRaises(IndexError):
+                m1.distance_field(source)
+            with self.assertRaises(IndexError):
+                m1.solve_many(targets, source=source)
+
+        m1.get_cell(0, 0).has_south_wall = not m1.get_cell(0, 0).has_south_wall
+        self.assertIsNot(m1.distance_field(), field)
+
+    def test_junction_graph_matches_bfs(self):
+        m1 = Maze(None, 21, 13, seed=6)
+        graph = m1.junction_graph()
+        self.assertIs(m1.junction_graph(), graph)
+        self.assertLess(graph.node_count, len(m1.grid))
+        self.assertGreater(graph.compression_ratio, 1.0)
+        for a, b in [((0, 0), (20, 12)), ((5, 5), (5, 6)), ((9, 3), (9, 3)), ((20, 0), (0, 12))]:
+            self.assertEqual(len(graph.search(a, b)[0]), len(bfs(m1.grid, a, b).path))
+        result = m1.solve(algorithm="junction")
+        self.assertEqual(result.path, bfs(m1.grid, m1.entrance, m1.exit_coords).path)
+
+        m1.get_cell(0, 0).has_east_wall = not m1.get_cell(0, 0).has_east_wall
+        self.assertIsNot(m1.junction_graph(), graph)
+
+    def test_generators_make_perfect_mazes(self):
+        for algorithm in sorted(generators.GENERATORS):
+            if generators.np is None and algorithm in ("binary_tree", "sidewinder"):
+                continue  # Need NumPy
+            with self.subTest(algorithm=algorithm):
+                m1 = Maze(None, 19, 11, seed=9, algorithm=algorithm, entrance="random", exit="random")
+                m2 = Maze(None, 19, 11, seed=9, algorithm=algorithm, entrance="random", exit="random")
+                self.assertEqual(bytes(m1.grid.walls), bytes(m2.grid.walls))
+                self.assertEqual(m1.tree_index().reachable, 19 * 11)  # connected, no loops
+                self.assertEqual(m1.cells_carved, 19 * 11)
+                self.assertTrue(m1.solve(algorithm="bfs", render=False))
+                window = CountingWindow()
+                m3 = Maze(window, 19, 11, seed=9, algorithm=algorithm, entrance="random", exit="random",
+                          animation=AnimationScheduler(instant=True))
+                self.assertEqual(bytes(m3.grid.walls), bytes(m1.grid.walls))
+
+    def test_maze_unknown_generator(self):
+        with self.assertRaises(ValueError):
+            Maze(None, 4, 4, algorithm="nope")
+
+    def test_raster_export(self):
+        m1 = Maze(None, 6, 4, cellwidth=10, cellheight=10, buffer=5, seed=2)
+        result = m1.solve(algorithm="bfs")
+        raster = MazeRaster(m1.grid, 10, 10, 5, result.path)
+        self.assertEqual((raster.width, raster.height), (6 * 10 + 12, 4 * 10 + 11))
+        rows = list(raster.rows())
+        self.assertEqual(len(rows), raster.height)
+        pixel = lambda x, y: rows[y][x * 3:x * 3 + 3]
+        self.assertEqual(pixel(0, 0), b"\xff\xff\xff")
+        self.assertEqual(pixel(5, 40), b"\x00\x00\x00")  # west wall
+        self.assertEqual(pixel(5 + 10 // 2, 5 + 10 // 2), b"\xff\x00\x00")  # path through (0, 0)
+        self.assertEqual(raster.tile(3, 7, 9, 11), b"".join(row[9:27] for row in rows[7:11]))
+        with tempfile.TemporaryDirectory() as tmp:
+            m1.export_image(os.path.join(tmp, "maze.ppm"), result)
+            with open(os.path.join(tmp, "maze.ppm"), "rb") as f:
+                self.assertEqual(f.read(), b"P6\n72 51\n255\n" + b"".join(rows))
+            m1.export_image(os.path.join(tmp, "maze.png"), result)
+            with open(os.path.join(tmp, "maze.png"), "rb") as f:
+                self.assertEqual(f.read(8), b"\x89PNG\r\n\x1a\n")
+            with self.assertRaises(ValueError):
+                m1.export_image(os.path.join(tmp, "maze.bmp"))
+
+    def test_raster_fractional_cell_sizes(self):
+        # As mazesolver.py sizes cells to fit the window
+        cellwidth, cellheight = (1024 - 100) / 30, (768 - 100) / 20
+        m1 = Maze(None, 30, 20, cellwidth, cellheight, 50, seed=1)
+        result = m1.solve()
+        raster = MazeRaster(m1.grid, cellwidth, cellheight, 50, result.path)
+        self.assertEqual((raster.width, raster.height), (1026, 769))
+        rows = list(raster.rows())
+        self.assertTrue(all(len(row) == raster.width * 3 for row in rows))
+        # The east wall of the maze sits where Tk would round it to
+        east = round(30 * cellwidth + 50) + 1
+        self.assertEqual(rows[400][east * 3:east * 3 + 3], b"\x00\x00\x00")
+        with tempfile.TemporaryDirectory() as tmp:
+            m1.export_image(os.path.join(tmp, "maze.ppm"), result)
+            with open(os.path.join(tmp, "maze.ppm"), "rb") as f:
+                self.assertEqual(f.read(), b"P6\n1026 769\n255\n" + b"".join(rows))
+            m1.export_image(os.path.join(tmp, "maze.png"), result)
+            with open(os.path.join(tmp, "maze.png"), "rb") as f:
+                self.assertEqual(f.read(24)[16:], b"\0\0\x04\x02\0\0\x03\x01")
+
+    def test_raster_path_direction(self):
+        m1 = Maze(None, 8, 6, seed=3)
+        inner = m1.solve(algorithm="bfs", render=False).path[1:-1]
+        forwards = list(MazeRaster(m1.grid, 10, 10, 10, inner).rows())
+        backwards = list(MazeRaster(m1.grid, 10, 10, 10, inner[::-1]).rows())
+        self.assertEqual(forwards, backwards)
+
+    def test_canvas_layers_reuse_items(self):
+        window = CountingWindow()
+        layers = CanvasLayers(window)
+        animation = AnimationScheduler(instant=True)
+
+        def run(seeds):
+            for seed in seeds:
+                m1 = Maze(window, 8, 5, seed=seed, animation=animation, layers=layers)
+                m1.solve()
+                m1.clear()
+        run(range(4))
+        created = window.items_created
+        self.assertEqual(layers.item_count, created)
+        self.assertGreater(created, 8 * 6 + 9 * 5)  # walls plus overlay pools
+        # The pools are as big as those mazes need; drawing them again creates nothing
+        run(range(4))
+        self.assertEqual(window.items_created, created)
+
+    def test_canvas_layers_keep_backtracks_on_top(self):
+        window = StackingWindow()
+        layers = CanvasLayers(window)
+        animation = AnimationScheduler(instant=True)
+        for seed in range(4):
+            m1 = Maze(window, 8, 5, seed=seed, animation=animation, layers=layers)
+            path = m1.solve().path
+            # Only the path (plus entrance and exit stubs) shows red; every
+            # abandoned branch is covered by its grey backtrack, even when
+            # both are drawn with items reused from an earlier maze
+            red = [colour for colour in window.top_colours().values() if colour == "red"]
+            self.assertEqual(len(red), len(path) - 1 + 2)
+            m1.clear()
+
+    def test_pipeline_builds_ahead_with_back_pressure(self):
+        def make_maze(n):
+            return Maze(None, 10, 8, seed=n, entrance="random", exit="random", record_carving=True)
+        with MazePipeline(make_maze, depth=2) as mazes:
+            for n in range(3):
+                m1 = mazes.get()
+                window = CountingWindow()
+                m1.show(window, animation=AnimationScheduler(instant=True))
+                self.assertGreater(window.items_created, 0)
+                m2 = Maze(CountingWindow(), 10, 8, seed=n, entrance="random", exit="random",
+                          animation=AnimationScheduler(instant=True))
+                self.assertEqual(bytes(m1.grid.walls), bytes(m2.grid.walls))
+                self.assertEqual(m1.solve().path, m2.solve().path)
+            time.sleep(0.2)
+            # One maze may be built and waiting to go in beyond the queue
+            self.assertLessEqual(mazes.produced, mazes.consumed + mazes.depth)
+        self.assertEqual(mazes.consumed, 3)
+        with self.assertRaises(InterruptedError):
+            mazes.get()
+
+    def test_tiled_maze_is_deterministic_and_connected(self):
+        roomy = TiledMaze(6, 5, seed=7)
+        for y in range(-8, 8):
+            for x in range(-8, 8):
+                walls = roomy.get_walls(x, y).value
+                self.assertEqual(bool(walls & EAST), bool(roomy.get_walls(x + 1, y).value & WEST))
+                self.assertEqual(bool(walls & SOUTH), bool(roomy.get_walls(x, y + 1).value & NORTH))
+        self.assertEqual(roomy.get_cell(-1, -1).walls, roomy.get_walls(-1, -1))
+        # Cells know where they are on the plane and can't be changed
+        cell = roomy.get_cell(100, -3)
+        self.assertEqual(cell.get_location(), (100, -3))
+        self.assertEqual(cell, roomy.get_cell(100, -3))
+        self.assertNotEqual(roomy.get_cell(0, 0), roomy.get_cell(6, 0))
+        with self.assertRaises(ValueError):
+            cell.has_east_wall = not cell.has_east_wall
+        self.assertTrue(roomy.chunk(0, 0).frozen)
+
+        # A cache too small for the search pages chunks in and out but finds the same path
+        cramped = TiledMaze(6, 5, seed=7, max_bytes=100)
+        result = roomy.solve((-13, -9), (17, 12))
+        self.assertTrue(result)
+        self.assertEqual(cramped.solve((-13, -9), (17, 12)).path, result.path)
+        self.assertGreater(cramped.evictions, 0)
+        self.assertLessEqual(len(cramped), 3)
+        for a, b in zip(result.path, result.path[1:]):
+            self.assertIn(b, roomy.open_neighbours(*a))
+
+        region = roomy.region(-6, -5, 12, 10)
+        self.assertEqual(region.walls[0], roomy.get_walls(-6, -5).value)
+        self.assertFalse(roomy.solve((0, 0), (500, 500), max_expanded=50))
+
+    def test_viewport_draws_only_what_is_visible(self):
+        counts = []
+        for size in (60, 240):
+            m1 = Maze(None, size, size, seed=3, algorithm="kruskal")
+            window = CountingWindow()
+            view = Viewport(window, m1.grid, 400, 300, scale=20)
+            view.pan(-200, -200)
+            self.assertEqual(view.visible_cells(), (10, 10, 30, 25))
+            view.draw()
+            self.assertFalse(view.coarse)
+            counts.append(window.items_created)
+        # Same view, same amount of drawing, whatever the maze size
+        self.assertLess(abs(counts[0] - counts[1]), counts[0] // 2)
+        self.assertLess(counts[1], 2 * 21 * 16)
+
+        cx, cy = view.to_cell(100, 50)
+        view.zoom(0.1, 100, 50)
+        self.assertAlmostEqual(view.to_cell(100, 50)[0], cx)
+        self.assertAlmostEqual(view.to_cell(100, 50)[1], cy)
+        window.reset_counters()
+        view.draw()
+        self.assertTrue(view.coarse)
+        self.assertEqual(window.items_created, 1)
+        self.assertEqual(len(window.image), len(b"P5\n400 300\n255\n") + 400 * 300)
+
+    def test_frozen_maze_solves_concurrently(self):
+        m1 = Maze(None, 30, 20, seed=12)
+        m1.freeze()
+        with self.assertRaises(ValueError):
+            m1.get_cell(3, 3).has_east_wall = False
+        with self.assertRaises(ValueError):
+            m1.grid.carve(0, 1)
+        queries = [((x, 0), (29 - x, 19)) for x in range(30)]
+        expected = [bfs(m1.grid, a, b).path for a, b in queries]
+        for algorithm in ("dfs", "bfs", "astar", "junction"):
+            solver = get_solver(algorithm)
+            with ThreadPoolExecutor(4) as pool:
+                paths = list(pool.map(lambda query: solver(m1.grid, *query).path, queries))
+            self.assertEqual(paths, expected)  # perfect maze: one path per query
+        with ThreadPoolExecutor(4) as pool:
+            distances = list(pool.map(lambda query: m1.distance(*query), queries))
+        self.assertEqual(distances, [len(path) - 1 for path in expected])
+        counts = [count for count, _, _ in benchmark.throughput(m1, threads=(1, 2), queries=8)]
+        self.assertEqual(counts, [1, 2])
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,197 @@
+import heapq
+import random
+import time
+from collections import OrderedDict
+from grid import Grid, Walls, WEST, EAST, NORTH, SOUTH
+from generators import get_generator
+from solvers import SolveResult
+from maze import Cell
+
+# Default cap on the bytes held by cached chunks
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+
+
+class TiledMaze:
+    """An endless maze over the whole integer plane, made in fixed-size chunks.
+
+    Chunk (cx, cy) covers cells cx * chunk_width ... and is carved, the
+    first time anything touches it, by one of the registered generators
+    seeded from (seed, cx, cy) alone, so it comes out the same whenever and
+    in whatever order it is built. Each pair of neighbouring chunks shares
+    one opening in their common border, placed by a seed both sides can
+    compute, so every cell of the plane is reachable from every other.
+
+    Chunks live in an LRU cache holding at most max_bytes of grid storage;
+    evicted chunks are simply carved again when next needed. Their grids
+    are frozen, since a change would be lost on eviction and would leave the
+    neighbouring chunk's side of the wall disagreeing.
+    """
+
+    def __init__(self, chunk_width=32, chunk_height=32, seed=0, algorithm="kruskal",
+                 max_bytes=DEFAULT_MAX_BYTES):
+        if chunk_width < 1 or chunk_height < 1:
+            raise ValueError("Chunk dimensions must be positive.")
+        self.chunk_width = chunk_width
+        self.chunk_height = chunk_height
+        self.seed = seed
+        self.algorithm = algorithm
+        self.max_bytes = max_bytes
+        self.__generate = get_generator(algorithm)
+        self.__chunks = OrderedDict()
+        self.nbytes = 0
+        self.loads = 0
+        self.hits = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.__chunks)
+
+    def __random(self, *key):
+        # String seeds hash the same way in every process and Python run
+        return random.Random(":".join(str(part) for part in (self.seed,) + key))
+
+    def __east_opening(self, cx, cy):
+        # Row of the opening between chunk (cx, cy) and chunk (cx + 1, cy)
+        return self.__random("east", cx, cy).randrange(self.chunk_height)
+
+    def __south_opening(self, cx, cy):
+        # Column of the opening between chunk (cx, cy) and chunk (cx, cy + 1)
+        return self.__random("south", cx, cy).randrange(self.chunk_width)
+
+    def __build(self, cx, cy):
+        width = self.chunk_width
+        height = self.chunk_height
+        grid = Grid(width, height)
+        self.__generate(grid, self.__random("chunk", cx, cy), (0, 0), None)
+        walls = grid.walls
+        walls[self.__east_opening(cx, cy) * width + width - 1] &= ~EAST
+        walls[self.__east_opening(cx - 1, cy) * width] &= ~WEST
+        walls[(height - 1) * width + self.__south_opening(cx, cy)] &= ~SOUTH
+        walls[self.__south_opening(cx, cy - 1)] &= ~NORTH
+        grid.changed()
+        grid.freeze()
+        return grid
+
+    def chunk(self, cx, cy):
+        """The Grid of chunk (cx, cy), carving it if it isn't cached."""
+        key = (cx, cy)
+        chunks = self.__chunks
+        grid = chunks.get(key)
+        if grid is not None:
+            self.hits += 1
+            chunks.move_to_end(key)
+            return grid
+        grid = self.__build(cx, cy)
+        self.loads += 1
+        chunks[key] = grid
+        self.nbytes += grid.nbytes
+        # Always keep the chunk just asked for, however small the cap
+        while self.nbytes > self.max_bytes and len(chunks) > 1:
+            _, old = chunks.popitem(last=False)
+            self.nbytes -= old.nbytes
+            self.evictions += 1
+        return grid
+
+    def locate(self, x, y):
+        """(chunk grid, index within it) for the cell at (x, y)."""
+        cx, lx = divmod(x, self.chunk_width)
+        cy, ly = divmod(y, self.chunk_height)
+        return self.chunk(cx, cy), ly * self.chunk_width + lx
+
+    def get_walls(self, x, y):
+        grid, index = self.locate(x, y)
+        return Walls(grid.walls[index])
+
+    def get_cell(self, x, y):
+        """A read-only TiledCell view of (x, y)."""
+        return TiledCell(self, x, y)
+
+    def region(self, x, y, width, height):
+        """A copy of the width x height cells from (x, y) as an ordinary Grid.
+
+        Handy for drawing or exporting part of the plane, or running the
+        regular solvers over it.
+        """
+        walls = bytearray(width * height)
+        for row in range(height):
+            for col in range(width):
+                grid, index = self.locate(x + col, y + row)
+                walls[row * width + col] = grid.walls[index]
+        return Grid.from_walls(width, height, walls)
+
+    def open_neighbours(self, x, y):
+        """The cells reachable in one step from (x, y), in N, S, W, E order."""
+        grid, index = self.locate(x, y)
+        walls = grid.walls[index]
+        neighbours = []
+        if not walls & NORTH:
+            neighbours.append((x, y - 1))
+        if not walls & SOUTH:
+            neighbours.append((x, y + 1))
+        if not walls & WEST:
+            neighbours.append((x - 1, y))
+        if not walls & EAST:
+            neighbours.append((x + 1, y))
+        return neighbours
+
+    def solve(self, start, goal, max_expanded=None):
+        """A* between any two cells, paging chunks in as the search reaches them.
+
+        Only the search's own bookkeeping is kept for visited cells, so the
+        chunk cache can be far smaller than the area searched. max_expanded
+        bounds the work; the result is empty if it runs out first.
+        """
+        start_time = time.perf_counter()
+        start, goal = tuple(start), tuple(goal)
+        goal_x, goal_y = goal
+        parent = {start: None}
+        cost = {start: 0}
+        heap = [(abs(start[0] - goal_x) + abs(start[1] - goal_y), 0, start)]
+        expanded = 0
+        while heap:
+            _, g, current = heapq.heappop(heap)
+            if g > cost[current]:
+                continue  # Stale heap entry
+            expanded += 1
+            if current == goal:
+                path = []
+                while current is not None:
+                    path.append(current)
+                    current = parent[current]
+                path.reverse()
+                return SolveResult("tiled_astar", path, expanded, time.perf_counter() - start_time)
+            if max_expanded is not None and expanded >= max_expanded:
+                break
+            for nxt in self.open_neighbours(*current):
+                if nxt not in cost or g + 1 < cost[nxt]:
+                    cost[nxt] = g + 1
+                    parent[nxt] = current
+                    heapq.heappush(heap, (g + 1 + abs(nxt[0] - goal_x) + abs(nxt[1] - goal_y), g + 1, nxt))
+        return SolveResult("tiled_astar", [], expanded, time.perf_counter() - start_time)
+
+
+class TiledCell(Cell):
+    """A Cell view of one cell of a TiledMaze, located by its plane (x, y).
+
+    Setting a wall raises ValueError, as the chunk grids are frozen. Two
+    views are equal when they are the same cell of the same TiledMaze,
+    whether or not its chunk was evicted and rebuilt in between.
+    """
+
+    def __init__(self, tiled, x, y):
+        cx, lx = divmod(x, tiled.chunk_width)
+        cy, ly = divmod(y, tiled.chunk_height)
+        super().__init__(None, lx, ly, grid=tiled.chunk(cx, cy))
+        self.__tiled = tiled
+        self.__location = (x, y)
+
+    def __eq__(self, other):
+        if not isinstance(other, TiledCell):
+            return NotImplemented
+        return self.__tiled is other.__tiled and self.__location == other.__location
+
+    def __hash__(self):
+        return hash((id(self.__tiled), self.__location))
+
+    def get_location(self):
+        return self.__location
@@ -0,0 +1,129 @@
+import time
+from array import array
+from collections import deque
+from solvers import open_neighbours
+
+
+class TreeIndex:
+    """Answers path and distance queries between any two cells of a perfect maze.
+
+    A perfect maze is a spanning tree. The index roots it once (one BFS),
+    recording each cell's parent and depth plus a skew-binary jump pointer.
+    The jump pointers give the same O(log n) ancestor and lowest-common-
+    ancestor queries as a binary-lifting table, but use O(n) memory rather
+    than O(n log n), which matters at millions of cells.
+
+    distance(a, b) runs in O(log n); path(a, b) in O(log n + path length).
+    Cells are (x, y) tuples.
+    """
+
+    def __init__(self, grid, root=(0, 0)):
+        start_time = time.perf_counter()
+        width = grid.width
+        walls = grid.walls
+        count = len(walls)
+        last_row = count - width
+        self.width = width
+        self.height = grid.height
+        self.root = grid.index(*root)
+        parent = array("i", [-1]) * count
+        depth = array("i", [-1]) * count
+        jump = array("i", [-1]) * count
+        parent[self.root] = self.root
+        depth[self.root] = 0
+        jump[self.root] = self.root
+        queue = deque([self.root])
+        passages = 0
+        while queue:
+            current = queue.popleft()
+            next_depth = depth[current] + 1
+            for nxt in open_neighbours(walls, width, last_row, current):
+                passages += 1
+                if depth[nxt] >= 0:
+                    continue
+                parent[nxt] = current
+                depth[nxt] = next_depth
+                # Parents come out of the queue before their children, so
+                # the parent's jump pointer is already set.
+                up = jump[current]
+                if depth[current] - depth[up] == depth[up] - depth[jump[up]]:
+                    jump[nxt] = jump[up]
+                else:
+                    jump[nxt] = current
+                queue.append(nxt)
+        # Every passage was seen from both ends; a tree has one fewer than it has cells
+        reached = count - depth.count(-1)
+        if passages // 2 != reached - 1:
+            raise ValueError("Maze has loops; a tree index needs a perfect maze.")
+        self.parent = parent
+        self.depth = depth
+        self.jump = jump
+        self.reachable = reached
+        self.build_time = time.perf_counter() - start_time
+
+    def __index(self, cell):
+        x, y = cell
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise IndexError("Cell is outside the maze.")
+        return y * self.width + x
+
+    def __ancestor_at(self, index, target_depth):
+        depth = self.depth
+        jump = self.jump
+        parent = self.parent
+        while depth[index] > target_depth:
+            if depth[jump[index]] >= target_depth:
+                index = jump[index]
+            else:
+                index = parent[index]
+        return index
+
+    def __lca(self, a, b):
+        depth = self.depth
+        if depth[a] < depth[b]:
+            a, b = b, a
+        a = self.__ancestor_at(a, depth[b])
+        jump = self.jump
+        parent = self.parent
+        # Equal depths mean equal jump structure, so both move in step
+        while a != b:
+            if jump[a] != jump[b]:
+                a, b = jump[a], jump[b]
+            else:
+                a, b = parent[a], parent[b]
+        return a
+
+    def connected(self, a, b):
+        return self.depth[self.__index(a)] >= 0 and self.depth[self.__index(b)] >= 0
+
+    def lowest_common_ancestor(self, a, b):
+        """The cell where the routes from a and b towards the root meet."""
+        if not self.connected(a, b):
+            return None
+        lca = self.__lca(self.__index(a), self.__index(b))
+        return (lca % self.width, lca // self.width)
+
+    def distance(self, a, b):
+        """Number of steps between cells a and b, or None if they aren't connected."""
+        if not self.connected(a, b):
+            return None
+        a, b = self.__index(a), self.__index(b)
+        depth = self.depth
+        return depth[a] + depth[b] - 2 * depth[self.__lca(a, b)]
+
+    def path(self, a, b):
+        """The cells from a to b inclusive, or None if they aren't connected."""
+        if not self.connected(a, b):
+            return None
+        a, b = self.__index(a), self.__index(b)
+        lca = self.__lca(a, b)
+        parent = self.parent
+        up = [a]
+        while up[-1] != lca:
+            up.append(parent[up[-1]])
+        down = [b]
+        while down[-1] != lca:
+            down.append(parent[down[-1]])
+        down.pop()
+        width = self.width
+        return [(index % width, index // width) for index in up + down[::-1]]
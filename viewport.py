@@ -0,0 +1,156 @@
+import math
+import time
+from operator import itemgetter
+from grid import Grid
+from maze import wall_segments
+
+TAG = "viewport"
+# Below this many pixels per cell, walls are no longer drawn one by one
+LOD_THRESHOLD = 4
+MIN_SCALE = 0.05
+MAX_SCALE = 200.0
+
+# Grey level for a cell by how many walls it has, for the coarse image
+_SHADES = bytes(255 - 50 * bin(walls & 15).count("1") for walls in range(256))
+
+
+class Viewport:
+    """Draws only the part of a maze that is on screen, with pan and zoom.
+
+    scale is in pixels per cell and (x, y) is the maze position, in cells,
+    at the top-left corner of the view. Walls of the visible cells are drawn
+    as merged line segments; once cells are smaller than lod_threshold
+    pixels the view is drawn as a single greyscale image instead, sampling
+    one cell per pixel. Either way the work done per draw depends on the
+    size of the view, not the maze.
+    """
+
+    def __init__(self, window, grid, width=1024, height=768, scale=20, lod_threshold=LOD_THRESHOLD):
+        self.window = window
+        self.grid = grid
+        self.width = width
+        self.height = height
+        self.scale = float(scale)
+        self.lod_threshold = lod_threshold
+        self.x = 0.0
+        self.y = 0.0
+        # Figures for the last draw
+        self.items_drawn = 0
+        self.draw_time = 0.0
+        self.coarse = False
+        self.__drag = None
+
+    def visible_cells(self):
+        """(x0, y0, x1, y1): the cells at least partly in view, x1 and y1 exclusive."""
+        x0 = max(0, math.floor(self.x))
+        y0 = max(0, math.floor(self.y))
+        x1 = min(self.grid.width, math.ceil(self.x + self.width / self.scale))
+        y1 = min(self.grid.height, math.ceil(self.y + self.height / self.scale))
+        return x0, y0, max(x0, x1), max(y0, y1)
+
+    def to_cell(self, px, py):
+        """The maze position under a point in the view."""
+        return (self.x + px / self.scale, self.y + py / self.scale)
+
+    def pan(self, dx, dy):
+        """Scroll the maze by dx, dy pixels."""
+        self.x -= dx / self.scale
+        self.y -= dy / self.scale
+
+    def zoom(self, factor, px=None, py=None):
+        """Zoom by factor, keeping the maze point under (px, py) in place."""
+        px = self.width / 2 if px is None else px
+        py = self.height / 2 if py is None else py
+        cx, cy = self.to_cell(px, py)
+        self.scale = min(MAX_SCALE, max(MIN_SCALE, self.scale * factor))
+        self.x = cx - px / self.scale
+        self.y = cy - py / self.scale
+
+    def fit(self):
+        """Zoom and pan so the whole maze is in view."""
+        self.scale = min(MAX_SCALE, max(MIN_SCALE, min(self.width / self.grid.width,
+                                                       self.height / self.grid.height)))
+        self.x = self.y = 0.0
+
+    def draw(self):
+        start = time.perf_counter()
+        window = self.window
+        window.deleteItems(TAG)
+        self.coarse = self.scale < self.lod_threshold
+        if self.coarse:
+            self.__draw_coarse()
+            self.items_drawn = 1
+        else:
+            self.items_drawn = self.__draw_walls()
+        window.redraw()
+        self.draw_time = time.perf_counter() - start
+
+    def __draw_walls(self):
+        x0, y0, x1, y1 = self.visible_cells()
+        if x0 == x1 or y0 == y1:
+            return 0
+        # Copy out just the visible cells and draw them at the origin...
+        grid = self.grid
+        width = grid.width
+        walls = grid.walls
+        visible = bytearray()
+        for y in range(y0, y1):
+            visible += walls[y * width + x0:y * width + x1]
+        lines = wall_segments(Grid.from_walls(x1 - x0, y1 - y0, visible), self.scale, self.scale, 0)
+        for line in lines:
+            self.window.createLine(line, tags=(TAG,))
+        # ...then move them all into place with one call
+        self.window.moveItems(TAG, (x0 - self.x) * self.scale, (y0 - self.y) * self.scale)
+        return len(lines)
+
+    def __draw_coarse(self):
+        grid = self.grid
+        width = grid.width
+        height = grid.height
+        walls = grid.walls
+        scale = self.scale
+        columns = [math.floor(self.x + px / scale) for px in range(self.width)]
+        inside = [px for px, column in enumerate(columns) if 0 <= column < width]
+        blank = b"\xff" * self.width
+        rows = []
+        if inside:
+            first, last = inside[0], inside[-1] + 1
+            offsets = columns[first:last]
+            for py in range(self.height):
+                y = math.floor(self.y + py / scale)
+                if not 0 <= y < height:
+                    rows.append(blank)
+                    continue
+                base = y * width
+                if len(offsets) == 1:
+                    cells = bytes([walls[base + offsets[0]]])
+                else:
+                    cells = bytes(itemgetter(*[base + x for x in offsets])(walls))
+                rows.append(blank[:first] + cells.translate(_SHADES) + blank[last:])
+        else:
+            rows = [blank] * self.height
+        data = b"P5\n%d %d\n255\n" % (self.width, self.height) + b"".join(rows)
+        self.window.drawImage(0, 0, data, tags=(TAG,))
+
+    def bind(self):
+        """Drag with the left button to pan; use the mouse wheel to zoom."""
+        canvas = self.window.canvas
+        canvas.bind("<ButtonPress-1>", self.__press)
+        canvas.bind("<B1-Motion>", self.__motion)
+        canvas.bind("<MouseWheel>", lambda event: self.__wheel(event, event.delta > 0))
+        canvas.bind("<Button-4>", lambda event: self.__wheel(event, True))
+        canvas.bind("<Button-5>", lambda event: self.__wheel(event, False))
+
+    def __press(self, event):
+        self.__drag = (event.x, event.y)
+
+    def __motion(self, event):
+        if self.__drag is None:
+            return
+        self.pan(event.x - self.__drag[0], event.y - self.__drag[1])
+        self.__drag = (event.x, event.y)
+        self.draw()
+
+    def __wheel(self, event, zoom_in):
+        self.zoom(1.25 if zoom_in else 0.8, event.x, event.y)
+        self.draw()